@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adminapp', '0002_duplicaterecord'),
+        ('invitations', '0012_invitation_guest_email_ticket_type_idx'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='duplicaterecord',
+            name='job',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='duplicate_records', to='invitations.bulkuploadjob'),
+        ),
+    ]
@@ -17,6 +17,19 @@ class TicketType(models.Model):
     class Meta:
         ordering = ["name"]
 
+    def save(self, *args, **kwargs):
+        # Get original value before save
+        old_value = None
+        if self.pk:
+            old_value = TicketType.objects.filter(pk=self.pk).values_list("enforce_unique_email", flat=True).first()
+
+        super().save(*args, **kwargs)
+
+        # Keep Invitation.enforced_email (the DB uniqueness slot) in step with the flag
+        if old_value is not None and old_value != self.enforce_unique_email:
+            from invitations.models import Invitation
+            Invitation.objects.sync_enforced_emails([self.pk])
+
     def __str__(self):
         return  f"{self.name} Unique: {self.enforce_unique_email}"
     
@@ -39,7 +52,14 @@ class InvitationSettings(models.Model):
 
         # If enforce_global_unique is turned ON
         if old_value is False and self.enforce_global_unique is True:
-            TicketType.objects.update(enforce_unique_email=True)
+            from invitations.models import Invitation
+            ticket_ids = list(TicketType.objects.filter(enforce_unique_email=False).values_list("id", flat=True))
+            TicketType.objects.filter(id__in=ticket_ids).update(enforce_unique_email=True)
+            Invitation.objects.sync_enforced_emails(ticket_ids)
+            # .update() skips post_save: invalidate cached bulk validations here
+            from invitations.utils.redis_utils import bump_version
+            from invitations.utils.validation_cache import TICKET_TYPES_VERSION
+            bump_version(TICKET_TYPES_VERSION)
 
     def __str__(self):
         return f"Global Unique: {self.enforce_global_unique}"
@@ -61,7 +81,8 @@ class DuplicateRecord(models.Model):
 
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="duplicate_records")
     job = models.ForeignKey(
-        "invitations.BulkUploadJob", on_delete=models.CASCADE, related_name="duplicate_records"
+        "invitations.BulkUploadJob", on_delete=models.CASCADE, null=True, blank=True,
+        related_name="duplicate_records"
     )
     ticket_type = models.ForeignKey(
         TicketType, on_delete=models.SET_NULL, null=True, blank=True, related_name="duplicate_records"
@@ -1,8 +1,16 @@
 import os
 from celery import Celery
+from decouple import config
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "gitex_invitation.settings.local")
 
 app = Celery("gitex_invitation")
 app.config_from_object("django.conf:settings", namespace="CELERY")
 app.autodiscover_tasks()
+
+app.conf.beat_schedule = {
+    "reconcile-invitation-quota": {
+        "task": "invitations.tasks.quota_tasks.reconcile_quota_task",
+        "schedule": config("QUOTA_RECONCILE_SECONDS", cast=int, default=30),
+    },
+}
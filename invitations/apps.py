@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class InvitationsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'invitations'
+
+    def ready(self):
+        from invitations import signals  # noqa: F401
+        from invitations.tasks import quota_tasks  # noqa: F401  (beat task)
+        from invitations.tasks import bloom_tasks  # noqa: F401  (worker_ready warm-up)
@@ -1,31 +1,178 @@
-from pybloom_live import ScalableBloomFilter
+import time
+import uuid
 from threading import Lock
 
+from decouple import config
+
+from invitations.utils.redis_utils import get_redis
+from .redis_bloom import RedisBloomFilter
+from .utils import make_dedup_key
+
+BLOOM_ERROR_RATE = config("BLOOM_ERROR_RATE", cast=float, default=0.001)
+# Filters are sized for max(invitations * BLOOM_GROWTH, BLOOM_MIN_CAPACITY) items
+BLOOM_MIN_CAPACITY = config("BLOOM_MIN_CAPACITY", cast=int, default=100000)
+BLOOM_GROWTH = config("BLOOM_GROWTH", cast=int, default=2)
+# How long a process trusts its cached copy of a filter's sizes
+BLOOM_META_TTL = config("BLOOM_META_TTL", cast=float, default=60.0)
+WARM_CHUNK = 5000
+
+
 class BloomManager:
     """
-    Thread-safe Bloom filter manager.
-    Keeps probabilistic record of seen items per namespace/job.
+    Shared Bloom filters, one per namespace and ticket type, stored in Redis
+    (see RedisBloomFilter). HASH bloom:{name}:meta holds the current bitmap key and
+    its sizes, so every worker hashes the same way. Processes cache the meta for
+    BLOOM_META_TTL seconds.
+
+    A rebuild publishes its new bitmap as next_* in the meta, loads it, then makes it
+    current. add_many writes to the next bitmap too while one is published, and reads
+    the meta back in the same pipeline: if the cached copy was stale the items are
+    added again with the fresh meta, so no add is lost to a rebuild.
     """
 
     _filters = {}
     _lock = Lock()
+    NEXT_FIELDS = ("next_key", "next_bits", "next_hashes")
+
+    @staticmethod
+    def filter_name(namespace, ticket_type=None):
+        return f"{namespace}:{(ticket_type or '').lower().strip()}"
+
+    @staticmethod
+    def meta_key(name):
+        return f"bloom:{name}:meta"
+
+    @staticmethod
+    def new_meta(name, capacity):
+        bits, hashes = RedisBloomFilter.optimal_size(capacity, BLOOM_ERROR_RATE)
+        return {"key": f"bloom:{name}:{uuid.uuid4().hex}", "bits": bits, "hashes": hashes, "capacity": capacity}
 
     @classmethod
-    def get_filter(cls, namespace="default"):
+    def get_meta(cls, name, refresh=False):
+        """The filter's meta, from the process cache unless it expired or `refresh`."""
+        now = time.monotonic()
+        with cls._lock:
+            cached = cls._filters.get(name)
+        if cached and cached[0] > now and not refresh:
+            return cached[1]
+
+        r = get_redis()
+        meta_key = cls.meta_key(name)
+        meta = r.hgetall(meta_key)
+        if "key" not in meta:
+            # First use without a warm load: start at the minimum size
+            pipe = r.pipeline(transaction=True)
+            for field, value in cls.new_meta(name, BLOOM_MIN_CAPACITY).items():
+                pipe.hsetnx(meta_key, field, value)
+            pipe.hgetall(meta_key)
+            meta = pipe.execute()[-1]
+
         with cls._lock:
-            if namespace not in cls._filters:
-                cls._filters[namespace] = ScalableBloomFilter(mode=ScalableBloomFilter.SMALL_SET_GROWTH)
-            return cls._filters[namespace]
+            cls._filters[name] = (now + BLOOM_META_TTL, meta)
+        return meta
+
+    @classmethod
+    def get_filter(cls, namespace="default", ticket_type=None):
+        """The current filter (reads only; add through add_many)."""
+        meta = cls.get_meta(cls.filter_name(namespace, ticket_type))
+        return RedisBloomFilter(meta["key"], int(meta["bits"]), int(meta["hashes"]))
+
+    @classmethod
+    def add_many(cls, namespace, items, ticket_type=None, max_attempts=3):
+        """
+        Add items to the filter (and to the bitmap being rebuilt, if any).
+        Returns, per item, whether the current filter had already seen it.
+        """
+        items = list(items)
+        if not items:
+            return []
+        name = cls.filter_name(namespace, ticket_type)
+        r = get_redis()
+        for attempt in range(max_attempts):
+            meta = cls.get_meta(name, refresh=attempt > 0)
+            pipe = r.pipeline(transaction=False)
+            RedisBloomFilter(meta["key"], int(meta["bits"]), int(meta["hashes"]), redis_client=r).queue_add(pipe, items)
+            if meta.get("next_key"):
+                RedisBloomFilter(
+                    meta["next_key"], int(meta["next_bits"]), int(meta["next_hashes"]), redis_client=r
+                ).queue_add(pipe, items)
+            pipe.hmget(cls.meta_key(name), "key", "next_key")
+            replies = pipe.execute()
+            if replies[-1] == [meta["key"], meta.get("next_key")]:
+                break
+        return [all(old) for old in replies[:len(items)]]
 
     @classmethod
-    def seen_before(cls, namespace, item_key):
-        bloom = cls.get_filter(namespace)
-        if item_key in bloom:
-            return True
-        bloom.add(item_key)
-        return False
+    def seen_before(cls, namespace, item_key, ticket_type=None):
+        return cls.add_many(namespace, [item_key], ticket_type)[0]
+
+    @classmethod
+    def rebuild(cls, namespace, ticket_type, items, capacity):
+        """
+        Load `items` into a fresh bitmap sized for `capacity` and make it current.
+        Adds made meanwhile go to both bitmaps (see add_many). The previous bitmap
+        expires after BLOOM_META_TTL.
+        """
+        name = cls.filter_name(namespace, ticket_type)
+        r = get_redis()
+        meta_key = cls.meta_key(name)
+        cls.get_meta(name)  # the meta must exist before next_* is published
+        meta = cls.new_meta(name, capacity)
+        r.hset(meta_key, mapping={"next_key": meta["key"], "next_bits": meta["bits"], "next_hashes": meta["hashes"]})
+        bloom = RedisBloomFilter(meta["key"], meta["bits"], meta["hashes"], redis_client=r)
+        try:
+            batch = []
+            for item in items:
+                batch.append(item)
+                if len(batch) >= WARM_CHUNK:
+                    bloom.add_many(batch)
+                    batch = []
+            bloom.add_many(batch)
+        except Exception:
+            r.hdel(meta_key, *cls.NEXT_FIELDS)
+            r.delete(meta["key"])
+            raise
+
+        old_key = r.hget(meta_key, "key")
+        pipe = r.pipeline(transaction=True)
+        pipe.hset(meta_key, mapping=meta)
+        pipe.hdel(meta_key, *cls.NEXT_FIELDS)
+        if old_key:
+            pipe.expire(old_key, int(BLOOM_META_TTL) * 2)
+        pipe.execute()
+        with cls._lock:
+            cls._filters.pop(name, None)
+        return bloom
 
     @classmethod
-    def clear(cls, namespace):
+    def clear(cls, namespace, ticket_type=None):
+        name = cls.filter_name(namespace, ticket_type)
+        r = get_redis()
+        bitmaps = [key for key in r.hmget(cls.meta_key(name), "key", "next_key") if key]
+        r.delete(cls.meta_key(name), *bitmaps)
         with cls._lock:
-            cls._filters.pop(namespace, None)
+            cls._filters.pop(name, None)
+
+
+def warm_bloom_filters(namespace="invite"):
+    """
+    Rebuild the filter of every ticket type that enforces unique emails from its stored
+    invitations, each sized for its own invitation count.
+    Returns {ticket name: invitations loaded}.
+    """
+    from adminapp.models import TicketType
+    from invitations.models import Invitation
+
+    loaded = {}
+    for ticket in TicketType.objects.filter(enforce_unique_email=True):
+        emails = (
+            Invitation.objects.filter(ticket_type=ticket)
+            .exclude(enforced_email=None)
+            .order_by()
+            .values_list("enforced_email", flat=True)
+        )
+        count = emails.count()
+        keys = (make_dedup_key(email, ticket.name) for email in emails.iterator(chunk_size=WARM_CHUNK))
+        BloomManager.rebuild(namespace, ticket.name, keys, max(count * BLOOM_GROWTH, BLOOM_MIN_CAPACITY))
+        loaded[ticket.name] = count
+    return loaded
@@ -16,8 +16,8 @@ class DeduplicationService:
 
         dedup_logger.debug(f"[DE-DUP] Checking key = {key}")
 
-        # Step 1: Bloom quick check
-        seen_bloom = BloomManager.seen_before(self.namespace, key)
+        # Step 1: Bloom quick check (shared filter; the key is added as it is checked)
+        seen_bloom = BloomManager.seen_before(self.namespace, key, ticket_type)
 
         if seen_bloom:
             dedup_logger.debug(f"[DE-DUP] Bloom suggests: POSSIBLE DUPLICATE → {key}")
@@ -26,19 +26,52 @@ class DeduplicationService:
             seen_redis = RedisDeduper.check_and_lock(key, ttl=self.ttl, redis_client = self.redis_client )
 
             if not seen_redis:
-                dedup_logger.debug(f"[DE-DUP] Redis says: NOT duplicate → inserting into bloom → {key}")
-                BloomManager.get_filter(self.namespace).add(key)
+                dedup_logger.debug(f"[DE-DUP] Redis says: NOT duplicate → {key}")
                 return False
 
             dedup_logger.warning(f"[DE-DUP] ✅ CONFIRMED DUPLICATE → {key}")
             return True
 
-        # Step 2: Bloom says new → lock in Redis
-        first_time = RedisDeduper.check_and_lock(key, ttl=self.ttl, redis_client = self.redis_client )
+        # Step 2: Bloom says new → still lock with SET NX; Redis has the final say
+        seen_redis = RedisDeduper.check_and_lock(key, ttl=self.ttl, redis_client = self.redis_client )
 
-        if not first_time:
-            # Should not normally happen, but logged for clarity
+        if seen_redis:
+            # A concurrent check or a filter rebuild; logged for clarity
             dedup_logger.warning(f"[DE-DUP] Redis LOCK existed but bloom didn't know → {key}")
+            return True
 
         dedup_logger.info(f"[DE-DUP] ✅ NEW ENTRY (first time) → key stored → {key}")
         return False
+
+    def check_many(self, pairs):
+        """
+        Batched is_duplicate for (email, ticket_type) pairs: one pipelined Bloom update
+        per ticket type and one pipelined SET NX EX for the whole chunk. SET NX alone
+        decides; the Bloom result is only compared against it for logging.
+        Returns the duplicate mask. Pairs without a dedup key are never duplicates; a pair
+        repeated inside `pairs` is a duplicate from its second occurrence on.
+        """
+        keys = [make_dedup_key(email, ticket_type) if email else None for email, ticket_type in pairs]
+        live = [i for i, key in enumerate(keys) if key]
+
+        by_ticket = {}
+        for i in live:
+            by_ticket.setdefault(pairs[i][1].lower().strip(), []).append(i)
+        in_bloom = {}
+        for ticket, indexes in by_ticket.items():
+            seen = BloomManager.add_many(self.namespace, (keys[i] for i in indexes), ticket)
+            in_bloom.update(zip(indexes, seen))
+
+        locked = RedisDeduper.check_and_lock_many(
+            [keys[i] for i in live], ttl=self.ttl, redis_client=self.redis_client
+        )
+        mask = [False] * len(keys)
+        missed = 0
+        for i, is_dup in zip(live, locked):
+            mask[i] = is_dup
+            if is_dup and not in_bloom[i]:
+                missed += 1
+        if missed:
+            dedup_logger.warning(f"[DE-DUP] {missed} Redis LOCK(s) existed but bloom didn't know")
+        dedup_logger.debug(f"[DE-DUP] check_many: {len(keys)} pairs, {sum(mask)} duplicates")
+        return mask
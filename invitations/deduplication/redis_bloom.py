@@ -0,0 +1,73 @@
+import math
+
+import xxhash
+
+from invitations.utils.redis_utils import get_redis
+
+MASK_64 = (1 << 64) - 1
+# Redis bitmaps top out at 2^32 bits (512 MB)
+MAX_BITS = 1 << 32
+
+
+class RedisBloomFilter:
+    """
+    Bloom filter kept in a plain Redis bitmap, so every process shares it (no RedisBloom
+    module needed). An item's bit positions come from one xxh3-128 hash split into two
+    64-bit halves (double hashing); BITFIELD reads or sets all of them in one command
+    and many items go in one pipeline.
+    """
+
+    def __init__(self, key, bits, hashes, redis_client=None):
+        self.key = key
+        self.bits = bits
+        self.hashes = hashes
+        self.redis_client = redis_client or get_redis()
+
+    @staticmethod
+    def optimal_size(capacity, error_rate):
+        """(bits, hashes) for `capacity` items at a false-positive rate of `error_rate`."""
+        capacity = max(int(capacity), 1)
+        bits = math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))
+        bits = min(bits, MAX_BITS)
+        hashes = max(round(bits / capacity * math.log(2)), 1)
+        return bits, hashes
+
+    def positions(self, item):
+        digest = xxhash.xxh3_128_intdigest(item)
+        h1, h2 = digest >> 64, (digest & MASK_64) | 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
+    def _bitfield(self, pipe, item, op):
+        field = pipe.bitfield(self.key)
+        for pos in self.positions(item):
+            field = field.set("u1", pos, 1) if op == "set" else field.get("u1", pos)
+        field.execute()
+
+    def queue_add(self, pipe, items):
+        """Queue the BITFIELD SET of each item on `pipe` (one reply per item, its old bits)."""
+        for item in items:
+            self._bitfield(pipe, item, "set")
+
+    def add_many(self, items):
+        """Add items; returns, per item, whether all its bits were already set (seen before)."""
+        items = list(items)
+        if not items:
+            return []
+        pipe = self.redis_client.pipeline(transaction=False)
+        self.queue_add(pipe, items)
+        return [all(old) for old in pipe.execute()]
+
+    def contains_many(self, items):
+        items = list(items)
+        if not items:
+            return []
+        pipe = self.redis_client.pipeline(transaction=False)
+        for item in items:
+            self._bitfield(pipe, item, "get")
+        return [all(bits) for bits in pipe.execute()]
+
+    def add(self, item):
+        return self.add_many([item])[0]
+
+    def __contains__(self, item):
+        return self.contains_many([item])[0]
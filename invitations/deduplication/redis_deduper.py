@@ -12,13 +12,22 @@ class RedisDeduper:
     @staticmethod
     def check_and_lock(key, ttl=3600, redis_client= "redis://localhost:6379/0"):
         r = redis_client
-        # SETNX (set if not exists)
-        was_set = r.setnx(key, 1)
+        # SET NX EX: lock and expiry in one round trip
+        was_set = r.set(key, 1, nx=True, ex=ttl)
         if was_set:
-            r.expire(key, ttl)
             return False  # Not duplicate
         return True  # Duplicate already seen
 
+    @staticmethod
+    def check_and_lock_many(keys, ttl=3600, redis_client=None):
+        """Pipelined check_and_lock: one SET NX EX per key, one round trip. Returns the duplicate mask."""
+        if not keys:
+            return []
+        pipe = redis_client.pipeline(transaction=False)
+        for key in keys:
+            pipe.set(key, 1, nx=True, ex=ttl)
+        return [not was_set for was_set in pipe.execute()]
+
     @staticmethod
     def clear_namespace(namespace_prefix, redis_client):
         r = redis_client
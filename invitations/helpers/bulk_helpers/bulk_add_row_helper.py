@@ -1,11 +1,13 @@
 from rest_framework.response import Response
 from rest_framework import status
-from threading import Lock
 
-from invitations.models import BulkUploadJob, Invitation
-from invitations.utils.redis_utils import push_row, get_stats, set_stats, range_rows
-from invitations.utils.validate_row_csv import load_ticket_types_cache, validate_row_csv_dict
-from invitations.utils.bulk_email_uniqueness_validator import load_ticket_email_validation_context
+from invitations.models import BulkUploadJob
+from invitations.utils.redis_utils import save_row, last_row, RowConflictError
+from invitations.utils.validate_row_csv import validate_row_csv_dict, dupe_key, set_file_level_duplicate
+from invitations.utils.bulk_email_uniqueness_validator import (
+    load_ticket_email_validation_context, load_existing_ticket_keys
+)
+from invitations.utils.dupe_index import expected_file_marks, move_dupe_id, resolve_dupe_groups
 
 
 def handle_bulk_add_row(request, job_id):
@@ -31,37 +33,10 @@ def handle_bulk_add_row(request, job_id):
     # --- Load global & ticket-level context once ---
     ticket_cache = load_ticket_email_validation_context()
 
-    # --- Prepare DB-level duplicate maps ---
-    existing_global = set()
-    existing_ticket = set()
-
-    invitations_qs = Invitation.objects.filter(user=request.user).values_list(
-        "guest_email", "ticket_type__name"
-    )
-    for email, ticket_name in invitations_qs:
-        if email:
-            existing_global.add(email.lower())
-        if email and ticket_name:
-            existing_ticket.add((email.lower(), ticket_name.lower()))
-
-    # --- Prepare file-level duplicate maps ---
-    existing_rows = range_rows(job_id)
-    # file-level duplicate trackers (thread-safe)
-    seen_global_dupes = {}
-    seen_ticket_dupes = {}
-    seen_lock = Lock()
-
-    for r in existing_rows:
-        email = (r.get("guest_email") or "").lower()
-        ticket = (r.get("ticket_type") or "").lower()
-        if email:
-            seen_global_dupes[email] = r["row_number"]
-        if email and ticket:
-            seen_ticket_dupes[(email, ticket)] = r["row_number"]
-
     # --- Assign next row id & number ---
-    next_id = max((r["id"] for r in existing_rows), default=0) + 1
-    next_row_number = max((r["row_number"] for r in existing_rows), default=0) + 1
+    previous = last_row(job_id)
+    next_id = previous["id"] + 1 if previous else 1
+    next_row_number = previous["row_number"] + 1 if previous else 1
 
     # --- Build CSV-like row for validation ---
     csv_like = {
@@ -72,20 +47,21 @@ def handle_bulk_add_row(request, job_id):
         "Personal Message": data.get("personal_message", ""),
     }
 
-    # --- Run the unified validator ---
+    # --- Run the unified validator (DB duplicates: indexed lookup of this email) ---
     new_row_obj, errors = validate_row_csv_dict(
         csv_like,
         next_row_number,
-        existing_global=existing_global,
-        existing_ticket=existing_ticket,
-        seen_global_dupes=seen_global_dupes,
-        seen_ticket_dupes=seen_ticket_dupes,
+        existing_ticket=load_existing_ticket_keys([csv_like["Email"]]),
         ticket_cache=ticket_cache,
-        # global_unique_enabled=global_unique_enabled,
-        seen_lock=seen_lock
     )
     new_row_obj["id"] = next_id
 
+    # --- File-level duplicates from the job's dupe index ---
+    new_key = dupe_key(new_row_obj, ticket_cache)
+    if new_key:
+        marks = expected_file_marks(job_id, [(new_row_obj, new_key)])
+        set_file_level_duplicate(new_row_obj, marks[next_id])
+
     if new_row_obj.get("file_level_duplicate") or new_row_obj.get("duplicate"):
         return Response(
             {
@@ -96,19 +72,21 @@ def handle_bulk_add_row(request, job_id):
             status=status.HTTP_400_BAD_REQUEST,
         ) 
 
-    push_row(job_id, new_row_obj)
-
-    stats = get_stats(job_id) or {}
-    total_count = stats.get("total_count", 0) + 1
-    valid_count = stats.get("valid_count", 0) + (1 if new_row_obj["status"] == "valid" else 0)
-    invalid_count = stats.get("invalid_count", 0) + (1 if new_row_obj["status"] == "invalid" else 0)
-
-    set_stats(
-        job_id,
-        total_count=total_count,
-        valid_count=valid_count,
-        invalid_count=invalid_count,
-    )
+    # Store row and update stats atomically (a concurrent add may have taken the id)
+    try:
+        stats = save_row(job_id, new_row_obj)
+    except RowConflictError as e:
+        return Response(
+            {"status": "error", "message": str(e)},
+            status=status.HTTP_409_CONFLICT,
+        )
+    move_dupe_id(job_id, next_id, new_key=new_key)
+    # a concurrent add of the same pair may have slipped past the check above
+    _, group_stats = resolve_dupe_groups(job_id, [new_key])
+    stats = group_stats or stats
+    total_count = stats["total_count"]
+    valid_count = stats["valid_count"]
+    invalid_count = stats["invalid_count"]
 
     job.total_count = total_count
     job.valid_count = valid_count
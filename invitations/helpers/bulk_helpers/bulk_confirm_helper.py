@@ -2,15 +2,21 @@ from django.db import transaction
 from rest_framework.response import Response
 from rest_framework import status
 
-from invitations.models import BulkUploadJob, InvitationStats
-from invitations.tasks.send_bulk_invite_task import send_bulk_invite
+from invitations.models import BulkUploadJob
+from invitations.tasks.send_bulk_invite_task import dispatch_bulk_invite, job_reservation, SEND_RESERVATION_TTL
+from invitations.utils.redis_utils import get_send_params, sent_row_count
+from invitations.utils.quota_service import reserve_quota, release_quota
 
 
 def handle_bulk_confirm_request(request, job_id):
     """
-    Handles confirming a bulk upload job — validates quota, updates status,
-    and triggers background processing for invitations.
+    Handles confirming a bulk upload job — reserves quota for it, updates status,
+    and triggers background processing for invitations. The reservation is
+    committed chunk by chunk and released when the send completes or fails.
+    Confirming a job whose send failed midway resumes it with its original
+    parameters, skipping the rows already committed.
     """
+    reservation = None  # set once this request holds the job's reservation
     try:
         with transaction.atomic():
             # --- Validate job ownership ---
@@ -26,30 +32,38 @@ def handle_bulk_confirm_request(request, job_id):
             default_message = request.data.get("default_personal_message")
 
             # --- Check job status ---
-            if job.status != BulkUploadJob.STATUS_PREVIEW_READY:
+            resume_params = None
+            if job.status == BulkUploadJob.STATUS_FAILED:
+                resume_params = get_send_params(job.id)
+
+            if job.status != BulkUploadJob.STATUS_PREVIEW_READY and resume_params is None:
                 return Response(
                     {"status": "error", "message": "File is not ready for processing."},
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-            # --- Fetch or create user stats ---
-            stats, _ = InvitationStats.objects.select_for_update().get_or_create(id=1)
-
             total_to_generate = job.valid_count or 0
-            if total_to_generate == 0:
+            if resume_params is not None:
+                expire_date = resume_params["expire_date"]
+                default_message = resume_params["default_message"]
+                total_to_generate = max(total_to_generate - sent_row_count(job.id), 0)
+            if total_to_generate == 0 and resume_params is None:
                 return Response(
                     {"status": "error", "message": "No valid invitations found to process."},
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-            # --- Check quota ---
-            if stats.remaining_invitations < total_to_generate:
-                shortfall = total_to_generate - stats.remaining_invitations
+            # --- Reserve quota for the whole send (fails fast, no stats row lock) ---
+            reserved, remaining, _ = reserve_quota(
+                total_to_generate, name=job_reservation(job.id), ttl=SEND_RESERVATION_TTL
+            )
+            if not reserved:
+                shortfall = total_to_generate - remaining
                 return Response(
                     {
                         "status": "error",
                         "message": (
-                            f"Quota exceeded. You have only {stats.remaining_invitations} remaining, "
+                            f"Quota exceeded. You have only {remaining} remaining, "
                             f"but trying to send {total_to_generate}. "
                             f"Please remove some rows or upgrade your plan (+{shortfall} more needed)."
                         ),
@@ -57,19 +71,27 @@ def handle_bulk_confirm_request(request, job_id):
                     },
                     status=status.HTTP_400_BAD_REQUEST,
                 )
+            reservation = job_reservation(job.id)
 
             # --- Update status and trigger task ---
             job.status = BulkUploadJob.STATUS_CONFIRMED
             job.save(update_fields=["status"])
 
-            send_bulk_invite.delay(str(job.id), expire_date, default_message)
+            dispatch_bulk_invite(job.id, expire_date, default_message, valid_count=total_to_generate)
 
             return Response(
-                {"status": "success", "message": "Processing started."},
+                {
+                    "status": "success",
+                    "message": "Processing resumed." if resume_params is not None else "Processing started.",
+                },
                 status=status.HTTP_202_ACCEPTED,
             )
 
     except Exception as e:
+        # Only give back what this request reserved: a failure before that point
+        # must not drop the reservation of a send already running for this job
+        if reservation:
+            release_quota(reservation)
         return Response(
             {"status": "error", "message": "Unable to confirm job.", "error": str(e)},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -1,6 +1,7 @@
 from rest_framework.response import Response
 from rest_framework import status
 from invitations.models import BulkUploadJob
+from invitations.utils.redis_utils import get_checkpoint, get_stats
 
 
 def handle_bulk_job_status(request, job_id):
@@ -16,6 +17,9 @@ def handle_bulk_job_status(request, job_id):
             status=status.HTTP_404_NOT_FOUND,
         )
 
+    checkpoint = get_checkpoint(job_id)
+    redis_stats = get_stats(job_id)
+
     data = {
         "job_id": str(job.id),
         "status": job.status,
@@ -24,6 +28,8 @@ def handle_bulk_job_status(request, job_id):
         "invalid_count": job.invalid_count,
         "created_count": getattr(job, "created_count", None),
         "updated_at": job.updated_at,
+        "processed_rows": checkpoint.get("last_row", job.total_count),
+        "resumed_count": redis_stats.get("resumes", 0),
     }
 
     return Response(
@@ -1,8 +1,26 @@
 from rest_framework.response import Response
 from rest_framework import status
 from invitations.models import BulkUploadJob
-from invitations.utils.redis_utils import get_redis, range_rows, delete_row, get_stats, set_stats
-import orjson
+from invitations.utils.redis_utils import get_rows, save_rows
+from invitations.utils.dupe_index import move_dupe_ids, resolve_dupe_groups, row_pair
+
+
+def delete_rows(job_id, rows):
+    """
+    Delete stored rows in one pass (each delete atomic with its index entries and counters),
+    then re-check the (email, ticket) groups they left: the next row may stop being a duplicate.
+    Returns (deleted ids, conflicting ids, {row_id: re-checked row}, counters).
+    """
+    applied, stats = save_rows(job_id, [(None, row) for row in rows])
+    deleted = [row["id"] for row, ok in zip(rows, applied) if ok]
+    conflicts = [row["id"] for row, ok in zip(rows, applied) if not ok]
+
+    moves = [(row["id"], row_pair(row), None) for row, ok in zip(rows, applied) if ok]
+    move_dupe_ids(job_id, moves)
+    affected, group_stats = resolve_dupe_groups(job_id, [old_key for _, old_key, _ in moves])
+    return deleted, conflicts, affected, group_stats or stats
+
+
 def handle_bulk_row_delete(request, job_id, row_id):
     """Handles deletion of a specific row from Redis by id."""
 
@@ -15,40 +33,25 @@ def handle_bulk_row_delete(request, job_id, row_id):
                 status=status.HTTP_404_NOT_FOUND,
             )
 
-        r = get_redis()
-        redis_key = f"bulk:job:{job_id}:rows"
-
-        # Check if row exists
-        if not r.hexists(redis_key, str(row_id)):
+        # Fetch row for status
+        rows, missing = get_rows(job_id, [row_id])
+        if missing:
             return Response(
                 {"status": "error", "message": f"Row with id {row_id} not found."},
                 status=status.HTTP_404_NOT_FOUND,
             )
+        row = rows[0]
 
-        # Fetch row for status
-        row = orjson.loads(r.hget(redis_key, str(row_id)))
-        row_status = row.get("status", "").lower()
-
-        # Delete row
-        delete_row(job_id, row_id)
-
-        # Update stats
-        stats = get_stats(job_id)
-        total_count = max(stats.get("total_count", 0), 1) - 1
-        valid_count = stats.get("valid_count", 0)
-        invalid_count = stats.get("invalid_count", 0)
-
-        if row_status == "valid" and valid_count > 0:
-            valid_count -= 1
-        elif row_status == "invalid" and invalid_count > 0:
-            invalid_count -= 1
-
-        set_stats(
-            job_id,
-            total_count=total_count,
-            valid_count=valid_count,
-            invalid_count=invalid_count,
-        )
+        # Delete row and update stats atomically
+        _, conflicts, _, stats = delete_rows(job_id, [row])
+        if conflicts:
+            return Response(
+                {"status": "error", "message": f"Row {row_id} was changed by another request."},
+                status=status.HTTP_409_CONFLICT,
+            )
+        total_count = stats["total_count"]
+        valid_count = stats["valid_count"]
+        invalid_count = stats["invalid_count"]
 
         job.total_count = total_count
         job.valid_count = valid_count
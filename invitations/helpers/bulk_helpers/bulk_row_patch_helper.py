@@ -1,11 +1,99 @@
 from rest_framework.response import Response
 from rest_framework import status
-from threading import Lock
 
-from invitations.models import BulkUploadJob, Invitation
-from invitations.utils.redis_utils import range_rows, update_row, get_stats, incr_stats
-from invitations.utils.validate_row_csv import load_ticket_types_cache, validate_row_csv_dict
-from invitations.utils.bulk_email_uniqueness_validator import load_ticket_email_validation_context
+from invitations.models import BulkUploadJob
+from invitations.utils.redis_utils import get_rows, save_rows, RowConflictError
+from invitations.utils.validate_row_csv import validate_row_csv_dict, dupe_key, set_file_level_duplicate
+from invitations.utils.bulk_email_uniqueness_validator import (
+    load_ticket_email_validation_context, load_existing_ticket_keys
+)
+from invitations.utils.dupe_index import expected_file_marks, move_dupe_ids, resolve_dupe_groups, row_pair
+
+EDITABLE_FIELDS = ("guest_name", "guest_email", "ticket_type", "company", "personal_message")
+
+
+def patch_rows(job_id, current_rows, edits_by_id, ticket_cache):
+    """
+    Re-validate stored rows with their edits applied and save them in one pass.
+    - DB duplicates: one indexed lookup for all edited emails
+    - File-level duplicates: the job's dupe index; edited rows are written with
+      their marks, then rows of every old and new (email, ticket) group are
+      re-checked, so e.g. the next row of a group an edited row leaves becomes
+      valid again
+    Returns ({row_id: saved row}, {row_id: other re-checked row}, conflicting ids, counters).
+    """
+    edited_rows = []
+    for current_row in current_rows:
+        edited = dict(current_row)
+        for k in EDITABLE_FIELDS:
+            if k in edits_by_id[current_row["id"]]:
+                edited[k] = edits_by_id[current_row["id"]][k]
+        edited_rows.append(edited)
+
+    existing_ticket = load_existing_ticket_keys(
+        (row.get("guest_email") or "").strip() for row in edited_rows
+    )
+
+    new_rows = []
+    for current_row, edited in zip(current_rows, edited_rows):
+        csv_like = {
+            "Full Name": edited.get("guest_name", ""),
+            "Email": edited.get("guest_email", ""),
+            "Ticket Type": edited.get("ticket_type", ""),
+            "Company": edited.get("company", ""),
+            "Personal Message": edited.get("personal_message", ""),
+        }
+        new_row_obj, _ = validate_row_csv_dict(
+            csv_like,
+            current_row["row_number"],
+            existing_ticket=existing_ticket,
+            ticket_cache=ticket_cache,
+        )
+        new_row_obj["id"] = current_row["id"]  # Preserve id
+        new_rows.append(new_row_obj)
+
+    # File-level marks go in with the write, so the counters are right from the start
+    new_keys = [dupe_key(new_row_obj, ticket_cache) for new_row_obj in new_rows]
+    marks = expected_file_marks(job_id, list(zip(new_rows, new_keys)))
+    for new_row_obj, new_key in zip(new_rows, new_keys):
+        if new_key is not None:
+            set_file_level_duplicate(new_row_obj, marks[new_row_obj["id"]])
+    writes = list(zip(new_rows, current_rows))
+
+    # Rows, index and stats: one atomic script call per row, one round trip
+    applied, stats = save_rows(job_id, writes)
+
+    saved, conflicts, moves = {}, [], []
+    for (new_row_obj, stored_row), new_key, ok in zip(writes, new_keys, applied):
+        if not ok:
+            conflicts.append(stored_row["id"])
+            continue
+        saved[new_row_obj["id"]] = new_row_obj
+        moves.append((new_row_obj["id"], row_pair(stored_row), new_key))
+
+    move_dupe_ids(job_id, moves)
+    changed, group_stats = resolve_dupe_groups(
+        job_id, [key for _, old_key, new_key in moves for key in (old_key, new_key)]
+    )
+    affected = {}
+    for row_id, row_obj in changed.items():
+        if row_id in saved:
+            saved[row_id] = row_obj
+        else:
+            affected[row_id] = row_obj
+    return saved, affected, conflicts, group_stats or stats
+
+
+def patch_row(job_id, current_row, edits, ticket_cache):
+    """
+    Single-row patch_rows. Returns (saved row, counters).
+    Raises RowConflictError on a concurrent edit.
+    """
+    saved, _, conflicts, stats = patch_rows(job_id, [current_row], {current_row["id"]: edits}, ticket_cache)
+    if conflicts:
+        raise RowConflictError(f"Row {current_row['id']} was changed by another request.")
+    return saved[current_row["id"]], stats
+
 
 def handle_bulk_row_patch(request, job_id, row_id):
     """Handles PATCH logic for updating a single row by id."""
@@ -19,90 +107,22 @@ def handle_bulk_row_patch(request, job_id, row_id):
         )
 
     # Fetch the row by id
-    rows = range_rows(job_id, id_list=[row_id])
-    if not rows:
+    rows, missing = get_rows(job_id, [row_id])
+    if missing:
         return Response(
             {"status": "error", "message": f"Row with id {row_id} not found."},
             status=status.HTTP_404_NOT_FOUND,
         )
-    current_row = rows[0]
-    print(f"Updating row: id={row_id}, data={current_row}")
-    edits = request.data
-
-    # Apply incoming edits
-    for k in ("guest_name", "guest_email", "ticket_type", "company", "personal_message"):
-        if k in edits:
-            current_row[k] = edits[k]
-
-    # --- Prepare file-level duplicate maps (excluding current row) ---
-    all_rows = range_rows(job_id)
 
-    # file-level duplicate trackers (thread-safe)
-    seen_global_dupes = {}
-    seen_ticket_dupes = {}
-    seen_lock = Lock()
-
-    for r in all_rows:
-        if r["id"] == row_id:
-            continue
-        email = (r.get("guest_email") or "").lower()
-        ticket = (r.get("ticket_type") or "").lower()
-        if email:
-            seen_global_dupes[email] = r["row_number"]
-        if email and ticket:
-            seen_ticket_dupes[(email, ticket)] = r["row_number"]
-
-    csv_like = {
-        "Full Name": current_row.get("guest_name", ""),
-        "Email": current_row.get("guest_email", ""),
-        "Ticket Type": current_row.get("ticket_type", ""),
-        "Company": current_row.get("company", ""),
-        "Personal Message": current_row.get("personal_message", ""),
-    }
     ticket_cache = load_ticket_email_validation_context()
-    # --- Prepare DB-level duplicate maps ---
-    existing_global = set()
-    existing_ticket = set()
-    invitations_qs = Invitation.objects.filter(user=request.user).values_list(
-    "guest_email", "ticket_type__name"
-)
-    for email, ticket_name in invitations_qs:
-        if email:
-            existing_global.add(email.lower())
-        if email and ticket_name:
-            existing_ticket.add((email.lower(), ticket_name.lower()))
-    new_row_obj, _ = validate_row_csv_dict(
-        csv_like,
-        current_row["row_number"],
-        existing_global=existing_global,
-        existing_ticket=existing_ticket,
-        ticket_cache=ticket_cache,
-        # global_unique_enabled=global_unique_enabled,
-        seen_global_dupes=seen_global_dupes,
-        seen_ticket_dupes=seen_ticket_dupes, 
-        seen_lock=seen_lock
-
-    )
-    new_row_obj["id"] = row_id  # Preserve id
-
-    # Update stats if status changes
-    old_status = current_row["status"]
-    new_status = new_row_obj["status"]
-    if old_status != new_status:
-        if new_status == "valid":
-            incr_stats(job_id, "valid_count", 1)
-            if old_status == "invalid":
-                incr_stats(job_id, "invalid_count", -1)
-        else:
-            incr_stats(job_id, "invalid_count", 1)
-            if old_status == "valid":
-                incr_stats(job_id, "valid_count", -1)
-
-    # Update Redis
-    update_row(job_id, row_id, new_row_obj)
+    try:
+        new_row_obj, stats = patch_row(job_id, rows[0], request.data, ticket_cache)
+    except RowConflictError as e:
+        return Response(
+            {"status": "error", "message": str(e)},
+            status=status.HTTP_409_CONFLICT,
+        )
 
-    # Get updated stats
-    stats = get_stats(job_id)
     BulkUploadJob.objects.filter(id=job_id).update(
         total_count=stats["total_count"],
         valid_count=stats["valid_count"],
@@ -117,4 +137,3 @@ def handle_bulk_row_patch(request, job_id, row_id):
         },
         status=status.HTTP_200_OK,
     )
-
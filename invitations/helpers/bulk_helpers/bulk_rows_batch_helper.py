@@ -0,0 +1,127 @@
+from decouple import config
+from rest_framework.response import Response
+from rest_framework import status
+
+from invitations.models import BulkUploadJob
+from invitations.utils.redis_utils import get_rows, get_stats
+from invitations.utils.bulk_email_uniqueness_validator import load_ticket_email_validation_context
+from invitations.helpers.bulk_helpers.bulk_row_patch_helper import patch_rows
+from invitations.helpers.bulk_helpers.bulk_row_delete_helper import delete_rows
+
+BATCH_EDIT_MAX_ROWS = config("BULK_BATCH_EDIT_MAX_ROWS", cast=int, default=1000)
+
+
+def _get_job(request, job_id):
+    try:
+        return BulkUploadJob.objects.get(id=job_id, user=request.user)
+    except BulkUploadJob.DoesNotExist:
+        return None
+
+
+def _parse_ids(values):
+    """Row ids as ints (first occurrence order), or None when any is not an integer."""
+    try:
+        return list(dict.fromkeys(int(v) for v in values))
+    except (TypeError, ValueError):
+        return None
+
+
+def _save_job_counts(job, stats):
+    stats = stats or get_stats(job.id)
+    counts = {k: stats.get(k, 0) for k in ("total_count", "valid_count", "invalid_count")}
+    BulkUploadJob.objects.filter(id=job.id).update(**counts)
+    return counts
+
+
+def handle_bulk_rows_batch_patch(request, job_id):
+    """
+    Handles PATCH of many rows at once: {"rows": [{"id": 5, "guest_email": "..."}, ...]}.
+    All rows are re-validated in one pass and written in one Redis round trip.
+    """
+    job = _get_job(request, job_id)
+    if job is None:
+        return Response(
+            {"status": "error", "message": "Job not found."},
+            status=status.HTTP_404_NOT_FOUND,
+        )
+
+    patches = request.data.get("rows")
+    if not isinstance(patches, list) or not patches or not all(isinstance(p, dict) for p in patches):
+        return Response(
+            {"status": "error", "message": "'rows' must be a non-empty list of row objects."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    if len(patches) > BATCH_EDIT_MAX_ROWS:
+        return Response(
+            {"status": "error", "message": f"At most {BATCH_EDIT_MAX_ROWS} rows per request."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    ids = _parse_ids(p.get("id") for p in patches)
+    if ids is None:
+        return Response(
+            {"status": "error", "message": "Every row needs an integer 'id'."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    # later patches of the same id win
+    edits_by_id = {}
+    for patch in patches:
+        edits_by_id.setdefault(int(patch["id"]), {}).update(patch)
+
+    rows, missing = get_rows(job_id, ids)
+    ticket_cache = load_ticket_email_validation_context()
+    saved, affected, conflicts, stats = patch_rows(job_id, rows, edits_by_id, ticket_cache)
+    counts = _save_job_counts(job, stats)
+
+    return Response(
+        {
+            "status": "success",
+            "message": f"{len(saved)} rows updated.",
+            "data": [saved[row_id] for row_id in ids if row_id in saved],
+            "affected_rows": list(affected.values()),
+            "missing": missing,
+            "conflicts": conflicts,
+            "stats": counts,
+        },
+        status=status.HTTP_200_OK,
+    )
+
+
+def handle_bulk_rows_batch_delete(request, job_id):
+    """Handles DELETE of many rows at once: {"ids": [1, 2, 3]}."""
+    job = _get_job(request, job_id)
+    if job is None:
+        return Response(
+            {"status": "error", "message": "Job not found."},
+            status=status.HTTP_404_NOT_FOUND,
+        )
+
+    values = request.data.get("ids")
+    ids = _parse_ids(values) if isinstance(values, list) and values else None
+    if ids is None:
+        return Response(
+            {"status": "error", "message": "'ids' must be a non-empty list of integer row ids."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    if len(ids) > BATCH_EDIT_MAX_ROWS:
+        return Response(
+            {"status": "error", "message": f"At most {BATCH_EDIT_MAX_ROWS} rows per request."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    rows, missing = get_rows(job_id, ids)
+    deleted, conflicts, affected, stats = delete_rows(job_id, rows)
+    counts = _save_job_counts(job, stats)
+
+    return Response(
+        {
+            "status": "success",
+            "message": f"{len(deleted)} rows deleted.",
+            "deleted": deleted,
+            "affected_rows": list(affected.values()),
+            "missing": missing,
+            "conflicts": conflicts,
+            "stats": counts,
+        },
+        status=status.HTTP_200_OK,
+    )
@@ -4,6 +4,9 @@ from rest_framework import status
 from invitations.serializers import BulkUploadCreateSerializer
 from invitations.models import BulkUploadJob
 from invitations.tasks.validate_bulk_csv_task import validate_csv_file_task
+from invitations.utils.validation_cache import (
+    file_digest, validation_cache_key, restore_validation_result
+)
 
 
 def handle_bulk_upload(request):
@@ -12,7 +15,8 @@ def handle_bulk_upload(request):
     - Validates uploaded CSV
     - Checks file size
     - Creates BulkUploadJob
-    - Starts async validation
+    - Reuses cached validation for an identical re-upload
+    - Starts async validation otherwise
     """
     serializer = BulkUploadCreateSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
@@ -26,6 +30,8 @@ def handle_bulk_upload(request):
             status=status.HTTP_400_BAD_REQUEST,
         )
 
+    cache_key = validation_cache_key(file_digest(uploaded_file))
+
     # Create job record
     job = BulkUploadJob.objects.create(
         user=request.user,
@@ -34,14 +40,25 @@ def handle_bulk_upload(request):
         status=BulkUploadJob.STATUS_PENDING,
     )
 
+    # Same file, same ticket config, same existing invitations -> same rows
+    if restore_validation_result(job, cache_key):
+        return Response(
+            {
+                "status": "success",
+                "message": "File uploaded successfully. Validation reused from a previous upload.",
+                "data": {"job_id": str(job.id), "cached": True},
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
     # Trigger async validation task
-    validate_csv_file_task.delay(str(job.id))
+    validate_csv_file_task.delay(str(job.id), cache_key=cache_key)
 
     return Response(
         {
             "status": "success",
             "message": "File uploaded successfully. Validation started.",
-            "data": {"job_id": str(job.id)},
+            "data": {"job_id": str(job.id), "cached": False},
         },
         status=status.HTTP_201_CREATED,
     )
@@ -1,12 +1,8 @@
 from rest_framework.response import Response
 from rest_framework import status
 from invitations.models import BulkUploadJob
-from invitations.utils.redis_utils import range_rows, get_stats, get_status
-from rest_framework.response import Response
-from rest_framework import status
-from invitations.models import BulkUploadJob
-from invitations.utils.redis_utils import get_redis, range_rows, get_stats, get_status
-from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
+from invitations.utils.redis_utils import get_status, page_rows, count_rows, search_rows, ensure_row_index
+
 
 def get_job_or_404(job_id, user):
     """Fetch job or return None (for quick inline 404 check)."""
@@ -16,30 +12,6 @@ def get_job_or_404(job_id, user):
         return None
  
 
-def apply_row_filters(rows, request):
-    """Apply basic filters from query params."""
-    status_filter = request.query_params.get("status")
-    ticket_type_filter = request.query_params.get("ticket_type")
-    search_filter = request.query_params.get("search")
-
-    def match(row):
-        if status_filter and row.get("status") != status_filter.lower():
-            return False
-        if ticket_type_filter and ticket_type_filter.lower() not in row.get("ticket_type", "").lower():
-            return False
-        if search_filter:
-            search = search_filter.lower()
-            if not (
-                search in row.get("guest_name", "").lower()
-                or search in row.get("guest_email", "").lower()
-                or search in row.get("company_name", "").lower()
-            ):
-                return False
-        return True
-
-    return [r for r in rows if match(r)]
-
-
 def handle_bulk_rows_request(request, job_id):
     """Handles GET request to fetch rows for a bulk upload job with pagination and filtering."""
     try:
@@ -56,7 +28,6 @@ def handle_bulk_rows_request(request, job_id):
     search = request.query_params.get("search", "").strip().lower()
     status_filter  = request.query_params.get("status", "").lower()
     ticket_type = request.query_params.get("ticket_type", "").strip().lower()
-    print("STATUS:",status_filter)
     try:
         page = int(page)
         per_page = int(per_page)
@@ -66,57 +37,46 @@ def handle_bulk_rows_request(request, job_id):
             status=status.HTTP_400_BAD_REQUEST,
         )
 
-    # Fetch all rows
-    all_rows = range_rows(job_id)
-    
-    # Apply filters
-    filtered_rows = all_rows
+    per_page = max(per_page, 1)
+    if status_filter not in ("valid", "invalid"):
+        status_filter = None
+    ticket_type = ticket_type or None
+
+    ensure_row_index(job_id)
+
     if search:
-        filtered_rows = [
-            row for row in filtered_rows
-            if (search in (row.get("guest_name", "") or "").lower() or
-                search in (row.get("guest_email", "") or "").lower())
-        ]
-    if status_filter in ("valid", "invalid"):
-        filtered_rows = [
-            row for row in filtered_rows
-            if row.get("status", "").lower() == status_filter
-        ]
-    if ticket_type:
-        filtered_rows = [
-            row for row in filtered_rows
-            if (row.get("ticket_type", "") or "").lower() == ticket_type
-        ]
+        filtered_rows = search_rows(job_id, search, status=status_filter, ticket_type=ticket_type)
+        filtered_stats = {
+            "total_count": len(filtered_rows),
+            "valid_count": len([r for r in filtered_rows if r.get("status") == "valid"]),
+            "invalid_count": len([r for r in filtered_rows if r.get("status") == "invalid"]),
+        }
+    else:
+        filtered_stats = count_rows(job_id, status=status_filter, ticket_type=ticket_type)
 
-    # Paginate filtered rows
-    paginator = Paginator(filtered_rows, per_page)
-    try:
-        page_obj = paginator.page(page)
-    except PageNotAnInteger:
-        page_obj = paginator.page(1)
-    except EmptyPage:
-        page_obj = paginator.page(paginator.num_pages)
+    # Clamp the requested page into range
+    total_rows = filtered_stats["total_count"]
+    total_pages = max(1, -(-total_rows // per_page))
+    page = min(max(page, 1), total_pages)
+    offset = (page - 1) * per_page
 
-    # Update stats for filtered results
-    stats = get_stats(job_id)
-    filtered_stats = {
-        "total_count": len(filtered_rows),
-        "valid_count": len([r for r in filtered_rows if r.get("status") == "valid"]),
-        "invalid_count": len([r for r in filtered_rows if r.get("status") == "invalid"]),
-    }
+    if search:
+        page_data = filtered_rows[offset:offset + per_page]
+    else:
+        page_data = page_rows(job_id, offset, per_page, status=status_filter, ticket_type=ticket_type)
 
     return Response(
         {
             "status": "success",
             "message": "Rows fetched successfully.",
-            "data": page_obj.object_list,
+            "data": page_data,
             "stats": filtered_stats,
             "job_status": get_status(job_id),
             "pagination": {
-                "current_page": page_obj.number,
+                "current_page": page,
                 "per_page": per_page,
-                "total_pages": paginator.num_pages,
-                "total_rows": paginator.count,
+                "total_pages": total_pages,
+                "total_rows": total_rows,
             },
         },
         status=status.HTTP_200_OK,
@@ -2,6 +2,7 @@ from rest_framework.response import Response
 from rest_framework import status
 from datetime import datetime
 from django.utils import timezone
+from django.core.exceptions import ValidationError
 
 from invitations.models import Invitation
 from adminapp.models import TicketType
@@ -70,7 +71,13 @@ def handle_invitation_edit(request, pk):
             invitation.expire_date = expire_date
 
     invitation.updated_at = timezone.now()
-    invitation.save(update_fields=[*editable_fields, "updated_at"])
+    try:
+        invitation.save(update_fields=[*editable_fields, "updated_at"])
+    except ValidationError:
+        return Response(
+            {"status": "error", "message": "Email already exists for this ticket type."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
 
     serializer = InvitationDetailSerializer(invitation)
     return Response(
@@ -1,26 +1,35 @@
 from rest_framework.response import Response
 from rest_framework import status
 from invitations.serializers import InvitationStatsSerializer
-from invitations.models import InvitationStats
-from django.db import transaction 
+from invitations.utils.quota_service import quota_stats, quota_snapshot
 
 
 
 def get_user_invitation_stats(user):
     """
-    Fetch or create invitation stats for a given user.
+    Fetch invitation stats for a given user from the short-TTL quota snapshot
+    (no DB read, no row lock). Returns (stats, etag).
     """
-    stats, _ = InvitationStats.objects.select_for_update().get_or_create(id=1)
-    return stats
+    quota, etag = quota_snapshot()
+    return quota_stats(quota), etag
+
+
+def etag_matches(request, etag):
+    """True when the client's If-None-Match already names `etag`."""
+    header = request.headers.get("If-None-Match", "")
+    tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag in tags or "*" in tags
 
 
-@transaction.atomic
 def handle_invitation_stats_request(request):
     """
     Fetches and returns invitation statistics for the authenticated user.
+    Polling clients sending If-None-Match get a 304 while the counters are unchanged.
     """
     try:
-        stats = get_user_invitation_stats(request.user)
+        stats, etag = get_user_invitation_stats(request.user)
+        if etag_matches(request, etag):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
 
         if not stats:
             return Response(
@@ -39,6 +48,7 @@ def handle_invitation_stats_request(request):
                 "data": serializer.data,
             },
             status=status.HTTP_200_OK,
+            headers={"ETag": etag, "Cache-Control": "private, no-cache"},
         )
 
     except Exception as e:
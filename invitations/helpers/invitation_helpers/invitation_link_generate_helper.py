@@ -1,6 +1,6 @@
 from rest_framework.response import Response
 from rest_framework import status
-from invitations.models import InvitationStats
+from invitations.utils.quota_service import quota_stats
 from invitations.serializers import (
     InvitationLinkGenerateSerializer,
     InvitationStatsSerializer,
@@ -20,9 +20,8 @@ def handle_invitation_link_generate(request):
 
     serializer.save()
 
-    # Fetch or create invitation stats
-    invitation_stats, _ = InvitationStats.objects.get_or_create(id=1)
-    stats_serializer = InvitationStatsSerializer(invitation_stats)
+    # Live invitation stats
+    stats_serializer = InvitationStatsSerializer(quota_stats())
 
     return Response(
         {
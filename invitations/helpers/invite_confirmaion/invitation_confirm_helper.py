@@ -2,7 +2,8 @@ from django.db import transaction
 from django.utils import timezone
 from rest_framework.response import Response
 from rest_framework import status
-from invitations.models import Invitation, InvitationStats
+from invitations.models import Invitation
+from invitations.utils.quota_service import add_registered
 
 
 @transaction.atomic
@@ -64,9 +65,7 @@ def handle_invitation_confirm(request, link_code):
     )
 
     # ✅ Update exhibitor stats
-    stats, _ = InvitationStats.objects.select_for_update().get_or_create(id =1)
-    stats.registered_visitors += 1
-    stats.save(update_fields=["registered_visitors"])
+    transaction.on_commit(add_registered)
 
     return Response(
         {
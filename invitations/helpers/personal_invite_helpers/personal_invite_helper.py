@@ -1,18 +1,20 @@
+from uuid import uuid4
+
 from django.db import transaction
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.exceptions import ValidationError
-from invitations.models import Invitation, InvitationStats
+from invitations.models import Invitation
 from adminapp.models import TicketType
 from decouple import config
 from invitations.utils.exceptions import extract_validation_message
-from invitations.utils.decorators import validate_email_uniqueness
 from invitations.serializers import PersonalizedInvitationSerializer
+from invitations.utils.quota_service import reserve_quota, commit_quota, release_quota
 
-@validate_email_uniqueness
 def create_personal_invitation(user, data):
     """
-    Atomic: checks quota, creates Invitation, updates stats.
+    Atomic: reserves quota, creates Invitation, commits the reservation.
+    Email uniqueness is enforced by the insert itself (unique_enforced_email_per_ticket).
     Returns (invitation, created_bool)
     """
     email = data["guest_email"].lower().strip()
@@ -29,43 +31,42 @@ def create_personal_invitation(user, data):
         })
 
 
-    with transaction.atomic():
-        stats = InvitationStats.objects.select_for_update().get(id=1)
+    ok, _, reservation = reserve_quota(1)
+    if not ok:
+        raise ValidationError({
+            "detail": "You have reached your invitation limit."
+        })
 
-        if stats.remaining_invitations <= 0:
-            raise ValidationError({
-                "detail": "You have reached your invitation limit."
-            })
-        FRONTEND_INVITE_URL =  config('FRONTEND_INVITE_URL')
-        try:
-            invitation = Invitation.objects.create(
+    used = 0
+    try:
+        with transaction.atomic():
+            FRONTEND_INVITE_URL =  config('FRONTEND_INVITE_URL')
+            link_code = uuid4()
+            invitation = Invitation(
                 user=user,
                 guest_name=data["guest_name"],
                 guest_email=email,
                 company_name=data.get("company_name"),
                 personal_message=data.get("personal_message", ""),
-                ticket_type=ticket_type_obj, 
+                ticket_type=ticket_type_obj,
                 expire_date=data["expire_date"],
                 source_type="personal",
-                # link_code=,
-                # invitation_url=None,
+                link_code=link_code,
+                invitation_url=f'{FRONTEND_INVITE_URL}{link_code}/',
                 usage_limit=1,
                 usage_count=0,
                 status="active",
                 is_sent=True
             )
-            invitation.invitation_url = f'{FRONTEND_INVITE_URL}{str(invitation.link_code)}/'
-            stats.generated_invitations += 1 
-            stats.remaining_invitations = max(
-                stats.allocated_invitations - stats.generated_invitations, 0
-            )
-            stats.save(update_fields=["generated_invitations", "remaining_invitations"])
-            invitation.status = 'active'
-            invitation.save()
-        except Exception as e: 
-            invitation.status = "pending"
-            invitation.is_sent = False
-            invitation.save(force_insert=True)
+            created, _ = Invitation.objects.create_many([invitation])
+            if not created:
+                raise ValidationError({"guest_email": "Email already exists."})
+            used = 1
+    except Exception:
+        release_quota(reservation)
+        raise
+
+    commit_quota(reservation, used)
 
     return invitation, True
 
@@ -0,0 +1,68 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand
+
+from invitations.utils.validate_row_csv import apply_file_level_duplicate
+from invitations.utils.validation_engine import ValidationEngine, BACKENDS, BACKEND_INLINE
+
+
+def build_rows(count):
+    """Synthetic CSV rows: mostly valid, with bad names/emails and repeated emails."""
+    tickets = ["VIP", "Visitor", "Media"]
+    rows = []
+    for i in range(count):
+        email_id = i - 1 if i % 9 == 0 else i
+        rows.append({
+            "Full Name": "Guest Number" if i % 13 else "X",
+            "Email": f"guest{email_id}@example.com" if i % 17 else "not-an-email",
+            "Ticket Type": tickets[i % len(tickets)],
+            "Company": "Example LLC",
+            "Personal Message": "",
+        })
+    return rows
+
+
+class Command(BaseCommand):
+    help = "Benchmark bulk CSV row validation (rows/sec) per executor backend and worker count."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=20000)
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--backends", default=",".join(BACKENDS))
+        parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+
+    def handle(self, *args, **options):
+        rows = build_rows(options["rows"])
+        batch_size = options["batch_size"]
+        ticket_cache = {
+            "vip": {"name": "VIP", "enforce_unique_email": True},
+            "visitor": {"name": "Visitor", "enforce_unique_email": False},
+            "media": {"name": "Media", "enforce_unique_email": True},
+        }
+        existing_ticket = {(f"guest{i}@example.com", "vip") for i in range(0, len(rows), 50)}
+
+        worker_counts = sorted({1, 2, 4, 8, options["max_workers"]})
+        worker_counts = [w for w in worker_counts if w <= options["max_workers"]]
+
+        self.stdout.write(f"{len(rows)} rows, batch size {batch_size}, {os.cpu_count()} cores")
+        self.stdout.write(f"{'backend':<10} {'workers':>7} {'seconds':>9} {'rows/sec':>10}")
+
+        for backend in options["backends"].split(","):
+            counts = [1] if backend == BACKEND_INLINE else worker_counts
+            for workers in counts:
+                seen = {}
+                started = time.perf_counter()
+                with ValidationEngine(
+                    backend=backend,
+                    max_workers=workers,
+                    ticket_cache=ticket_cache,
+                    existing_ticket=existing_ticket,
+                ) as engine:
+                    for start in range(0, len(rows), batch_size):
+                        for row_obj in engine.validate(rows[start:start + batch_size], start + 1):
+                            apply_file_level_duplicate(row_obj, ticket_cache, seen)
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f"{backend:<10} {workers:>7} {elapsed:>9.2f} {len(rows) / elapsed:>10.0f}"
+                )
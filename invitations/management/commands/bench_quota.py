@@ -0,0 +1,89 @@
+import threading
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from invitations.models import InvitationStats
+from invitations.utils import quota_service
+from invitations.utils.redis_utils import get_redis
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark quota updates under parallel writers: the InvitationStats row lock "
+        "(select_for_update, rolled back) against the Redis quota service (scratch key)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--writers", type=int, nargs="+", default=[1, 4, 16, 32])
+        parser.add_argument("--seconds", type=float, default=3.0, help="Run time per writer count and mode.")
+        parser.add_argument("--mode", choices=["both", "db", "redis"], default="both")
+
+    def handle(self, *args, **options):
+        InvitationStats.objects.get_or_create(id=1)
+        modes = ["db", "redis"] if options["mode"] == "both" else [options["mode"]]
+        ops = {"db": self.db_op, "redis": self.redis_op}
+
+        self.stdout.write(f"{'mode':<6} {'writers':>8} {'ops':>10} {'ops/s':>10} {'p99 ms':>8}")
+        for mode in modes:
+            for writers in options["writers"]:
+                done, latencies = self.run(ops[mode], writers, options["seconds"])
+                latencies.sort()
+                p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000 if latencies else 0
+                self.stdout.write(
+                    f"{mode:<6} {writers:>8} {done:>10} {done / options['seconds']:>10.0f} {p99:>8.2f}"
+                )
+
+    def run(self, op, writers, seconds):
+        """Call `op` in a loop on `writers` threads for `seconds`; returns (ops done, latencies)."""
+        stop_at = time.perf_counter() + seconds
+        latencies = []
+        lock = threading.Lock()
+        barrier = threading.Barrier(writers)
+
+        def writer():
+            own = []
+            try:
+                barrier.wait()
+                while time.perf_counter() < stop_at:
+                    started = time.perf_counter()
+                    op()
+                    own.append(time.perf_counter() - started)
+            finally:
+                connection.close()
+            with lock:
+                latencies.extend(own)
+
+        self.quota_key = f"bench:quota:{uuid.uuid4()}"
+        get_redis().hset(self.quota_key, mapping={
+            "allocated": 10 ** 12, "generated": 0, "reserved": 0, "registered": 0, "credited": 0,
+        })
+        try:
+            threads = [threading.Thread(target=writer) for _ in range(writers)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        finally:
+            get_redis().delete(
+                self.quota_key,
+                f"{self.quota_key}:reservations",
+                f"{self.quota_key}:reservations:expiry",
+            )
+        return len(latencies), latencies
+
+    def db_op(self):
+        """The pre-quota-service pattern: lock the stats row, check, increment (rolled back)."""
+        with transaction.atomic():
+            stats = InvitationStats.objects.select_for_update().get(id=1)
+            if stats.remaining_invitations >= 0:
+                stats.generated_invitations += 1
+                stats.save(update_fields=["generated_invitations"])
+            transaction.set_rollback(True)
+
+    def redis_op(self):
+        ok, _, reservation = quota_service.reserve_quota(1, key=self.quota_key)
+        if ok:
+            quota_service.commit_quota(reservation, 1, key=self.quota_key)
@@ -0,0 +1,110 @@
+import time
+import uuid
+
+import orjson
+from django.core.management.base import BaseCommand
+
+from invitations.management.commands.bench_bulk_validation import build_rows
+from invitations.utils.dupe_index import append_dupe_ids, dupes_key, group_dupe_ids
+from invitations.utils.redis_utils import get_redis, index_row, ensure_search_index, delete_rows_key
+from invitations.utils.row_codec import encode_row, decode_row
+from invitations.utils.validate_row_csv import apply_file_level_duplicate
+from invitations.utils.validation_engine import ValidationEngine, BACKEND_INLINE
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the Redis row codec against plain orjson rows: bytes per row, and Redis "
+        "memory per row for the rows hash alone and for all of a scratch job's keys "
+        "(rows, index sets, duplicate index, optionally the search index)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=20000)
+        parser.add_argument("--message-length", type=int, default=400)
+        parser.add_argument("--no-redis", action="store_true", help="Skip the Redis MEMORY USAGE measurement.")
+        parser.add_argument(
+            "--search-index", action="store_true",
+            help="Also build the trigram search index (as the first search of a job does) before measuring.",
+        )
+
+    def handle(self, *args, **options):
+        ticket_cache = {
+            "vip": {"name": "VIP", "enforce_unique_email": True},
+            "visitor": {"name": "Visitor", "enforce_unique_email": False},
+            "media": {"name": "Media", "enforce_unique_email": True},
+        }
+        csv_rows = build_rows(options["rows"])
+        message = ("Looking forward to seeing you at the event. " * 20)[:options["message_length"]]
+        for i, row in enumerate(csv_rows):
+            row["Personal Message"] = message if i % 2 else ""
+
+        seen = {}
+        with ValidationEngine(backend=BACKEND_INLINE, ticket_cache=ticket_cache) as engine:
+            rows = engine.validate(csv_rows, 1)
+        for row_obj in rows:
+            apply_file_level_duplicate(row_obj, ticket_cache, seen)
+
+        encoders = {
+            "orjson": (orjson.dumps, orjson.loads),
+            "codec": (encode_row, decode_row),
+        }
+        self.stdout.write(f"{len(rows)} rows, personal_message {options['message_length']} chars on every other row")
+        self.stdout.write(
+            f"{'format':<8} {'bytes/row':>10} {'encode/s':>10} {'decode/s':>10} {'rows B/row':>11} {'job B/row':>10}"
+        )
+        for name, (encode, decode) in encoders.items():
+            started = time.perf_counter()
+            payloads = [encode(row_obj) for row_obj in rows]
+            encode_rate = len(rows) / (time.perf_counter() - started)
+
+            started = time.perf_counter()
+            for payload in payloads:
+                decode(payload)
+            decode_rate = len(rows) / (time.perf_counter() - started)
+
+            size = sum(len(p) for p in payloads) / len(payloads)
+            rows_size, job_size = ("-", "-") if options["no_redis"] else self.redis_bytes_per_row(
+                rows, payloads, ticket_cache, options["search_index"]
+            )
+            self.stdout.write(
+                f"{name:<8} {size:>10.1f} {encode_rate:>10.0f} {decode_rate:>10.0f} {rows_size:>11} {job_size:>10}"
+            )
+
+    def redis_bytes_per_row(self, rows, payloads, ticket_cache, search_index=False):
+        """
+        Store the rows as a scratch job the way validation does (rows hash, index sets,
+        duplicate index) and return MEMORY USAGE per row of the rows hash and of all
+        the job's keys.
+        """
+        r = get_redis()
+        job_id = f"bench:{uuid.uuid4()}"
+        rows_key = f"bulk:job:{job_id}:rows"
+        try:
+            for start in range(0, len(rows), 1000):
+                batch = rows[start:start + 1000]
+                pipe = r.pipeline(transaction=False)
+                pipe.hset(rows_key, mapping={
+                    row_obj["id"]: payload for row_obj, payload in zip(batch, payloads[start:start + 1000])
+                })
+                for row_obj in batch:
+                    index_row(pipe, job_id, row_obj)
+                append_dupe_ids(dupes_key(job_id), group_dupe_ids(batch, ticket_cache), client=pipe)
+                pipe.execute()
+            if search_index:
+                ensure_search_index(job_id)
+
+            keys = list(r.scan_iter(match=f"bulk:job:{job_id}:*", count=1000))
+            pipe = r.pipeline(transaction=False)
+            for key in keys:
+                pipe.memory_usage(key, samples=0)
+            usages = dict(zip(keys, pipe.execute()))
+            if not usages.get(rows_key):
+                return "-", "-"
+            total = sum(usage or 0 for usage in usages.values())
+            return f"{usages[rows_key] / len(rows):.1f}", f"{total / len(rows):.1f}"
+        except Exception as e:
+            self.stderr.write(f"Redis memory measurement skipped: {e}")
+            return "-", "-"
+        finally:
+            delete_rows_key(job_id)
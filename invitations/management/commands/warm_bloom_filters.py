@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from invitations.deduplication.bloom_manager import warm_bloom_filters
+
+
+class Command(BaseCommand):
+    help = "Rebuild the shared deduplication Bloom filters from stored invitations (one per unique-email ticket type)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--namespace", default="invite")
+
+    def handle(self, *args, **options):
+        loaded = warm_bloom_filters(options["namespace"])
+        for ticket, count in loaded.items():
+            self.stdout.write(f"{ticket:<30} {count:>10}")
+        self.stdout.write(self.style.SUCCESS(f"Warmed {len(loaded)} filter(s)."))
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-18 00:45
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adminapp', '0002_duplicaterecord'),
+        ('invitations', '0011_remove_invitationstats_invitations_user_id_6d4a26_idx_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='invitation',
+            index=models.Index(fields=['guest_email', 'ticket_type'], name='invitations_guest_e_e1d239_idx'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:25
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Min
+from django.db.models.functions import Lower, Trim
+
+
+def fill_enforced_email(apps, schema_editor):
+    """The oldest invitation of each (email, enforced ticket type) takes the uniqueness slot."""
+    Invitation = apps.get_model("invitations", "Invitation")
+    email = Lower(Trim("guest_email"))
+    first_ids = (
+        Invitation.objects.filter(ticket_type__enforce_unique_email=True)
+        .exclude(guest_email=None).exclude(guest_email="")
+        .values(email=email, ticket=models.F("ticket_type_id"))
+        .annotate(first_id=Min("id"))
+        .values("first_id")
+    )
+    Invitation.objects.filter(id__in=first_ids).update(enforced_email=email)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adminapp', '0003_alter_duplicaterecord_job'),
+        ('invitations', '0012_invitation_guest_email_ticket_type_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='invitation',
+            name='enforced_email',
+            field=models.EmailField(blank=True, editable=False, max_length=254, null=True),
+        ),
+        migrations.RunPython(fill_enforced_email, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invitations', '0013_invitation_enforced_email'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='invitation',
+            constraint=models.UniqueConstraint(fields=('enforced_email', 'ticket_type'), name='unique_enforced_email_per_ticket'),
+        ),
+    ]
@@ -1,7 +1,9 @@
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction, IntegrityError
+from django.db.models import Min
+from django.db.models.functions import Lower, Trim
 import uuid
 
 from adminapp.models import DuplicateRecord
@@ -30,6 +32,112 @@ class InvitationStats(models.Model):
 
 
 
+def enforced_email_for(email, ticket_type):
+    """The enforced_email value of an invitation: its email while the ticket type enforces unique emails."""
+    if not ticket_type.enforce_unique_email:
+        return None
+    return (email or "").strip().lower() or None
+
+
+class InvitationManager(models.Manager):
+    LINK_CODE_LOOKUP_CHUNK = 1000
+
+    def create_many(self, invitations, job=None, batch_size=1000):
+        """
+        Insert unsaved invitations optimistically (INSERT ... ON CONFLICT DO NOTHING).
+        For ticket types that enforce unique emails the unique_enforced_email_per_ticket
+        constraint rejects emails already stored or repeated in `invitations`; those
+        are logged with a single DuplicateRecord bulk insert. Invitations whose link_code
+        is already stored (e.g. a resent bulk row) are skipped and reported as neither.
+        Returns (created invitations, duplicate records).
+        """
+        from adminapp.models import TicketType
+        from invitations.utils.validation_cache import bump_invitation_versions
+
+        invitations = list(invitations)
+        if not invitations:
+            return [], []
+        ticket_ids = {invite.ticket_type_id for invite in invitations}
+        enforced = dict(
+            TicketType.objects.filter(id__in=ticket_ids, enforce_unique_email=True).values_list("id", "name")
+        )
+        for invite in invitations:
+            invite.guest_email = (invite.guest_email or "").strip().lower() or None
+            invite.enforced_email = invite.guest_email if invite.ticket_type_id in enforced else None
+
+        with transaction.atomic():
+            # ON CONFLICT DO NOTHING also skips link_code conflicts, and the read-back below
+            # would take the stored row for ours: drop codes that already exist (or repeat) first
+            taken = set(self._existing_link_codes([invite.link_code for invite in invitations]))
+            fresh = []
+            for invite in invitations:
+                if invite.link_code not in taken:
+                    taken.add(invite.link_code)
+                    fresh.append(invite)
+            invitations = fresh
+            self.bulk_create(invitations, batch_size=batch_size, ignore_conflicts=True)
+
+            # ON CONFLICT DO NOTHING returns no ids: read back the rows that made it in
+            ids = self._existing_link_codes([invite.link_code for invite in invitations])
+
+            created, duplicates = [], []
+            for invite in invitations:
+                invite.pk = ids.get(invite.link_code)
+                if invite.pk is not None:
+                    created.append(invite)
+                elif invite.enforced_email:
+                    duplicates.append(DuplicateRecord(
+                        user=invite.user,
+                        guest_email=invite.guest_email,
+                        job=job,
+                        ticket_type_id=invite.ticket_type_id,
+                        detection_source="db_check",
+                        scope="ticket",
+                        reason=f"Email already exists for this ticket: {enforced[invite.ticket_type_id].lower()}",
+                    ))
+
+            if duplicates:
+                DuplicateRecord.objects.bulk_create(duplicates, batch_size=batch_size)
+            if created:
+                # bulk_create skips post_save, so invalidate cached validations here
+                ticket_ids = {invite.ticket_type_id for invite in created}
+                transaction.on_commit(lambda: bump_invitation_versions(ticket_ids))
+        return created, duplicates
+
+    def _existing_link_codes(self, codes):
+        """{link_code: id} of the stored invitations among `codes`, looked up in chunks."""
+        ids = {}
+        for start in range(0, len(codes), self.LINK_CODE_LOOKUP_CHUNK):
+            ids.update(
+                self.filter(link_code__in=codes[start:start + self.LINK_CODE_LOOKUP_CHUNK])
+                .values_list("link_code", "id")
+            )
+        return ids
+
+    def sync_enforced_emails(self, ticket_type_ids):
+        """
+        Recompute enforced_email for the invitations of these ticket types after their
+        enforce_unique_email flag changed. When the flag turns on, the oldest invitation
+        of each (email, ticket type) takes the slot; duplicates created while it was off
+        keep NULL and stay as they are.
+        """
+        from adminapp.models import TicketType
+
+        with transaction.atomic():
+            self.filter(ticket_type_id__in=ticket_type_ids).exclude(enforced_email=None).update(enforced_email=None)
+            email = Lower(Trim("guest_email"))
+            first_ids = (
+                self.filter(
+                    ticket_type__in=TicketType.objects.filter(id__in=ticket_type_ids, enforce_unique_email=True)
+                )
+                .exclude(guest_email=None).exclude(guest_email="")
+                .values(email=email, ticket=models.F("ticket_type_id"))
+                .annotate(first_id=Min("id"))
+                .values("first_id")
+            )
+            return self.filter(id__in=first_ids).update(enforced_email=email)
+
+
 class Invitation(models.Model):
     """
     Represents any invitation record — personal, bulk, or generated link-based.
@@ -77,20 +185,32 @@ class Invitation(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     registered_at = models.DateTimeField(blank=True, null=True)
     registered = models.BooleanField(default=False)
+    # guest_email while the ticket type enforces unique emails, else NULL; backs the
+    # unique_enforced_email_per_ticket constraint (InvitationManager.sync_enforced_emails)
+    enforced_email = models.EmailField(blank=True, null=True, editable=False)
     link_is_active = models.BooleanField(default=True)
     link_limit_reached = models.BooleanField(default=True)
     is_sent = models.BooleanField(default=False)
+
+    objects = InvitationManager()
+
     class Meta:
         ordering = ["-created_at"]
 
 
         indexes = [
             models.Index(fields=["user", "guest_email"]),
+            models.Index(fields=["guest_email", "ticket_type"]),
             models.Index(fields=["user", "source_type"]),
             models.Index(fields=["link_code"]),
             models.Index(fields=["status"]),
             models.Index(fields=["expire_date"]),
         ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["enforced_email", "ticket_type"], name="unique_enforced_email_per_ticket"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.guest_name} ({self.guest_email}) via {self.source_type}"
@@ -108,37 +228,54 @@ class Invitation(models.Model):
         self.status = "expired"
         self.save(update_fields=["status", "updated_at"])
 
-    def save(self, *args, **kwargs):
-        # Avoid duplicate check on updates
-        if not self.pk:
-            ticket_type = self.ticket_type
-            email = (self.guest_email or "").strip().lower()
-            ticket_name = ticket_type.name.lower()
-            print("Ticket name ", ticket_name)
-            print("TICKET TYPE", ticket_type)
-            # 1️⃣ Check Ticket-level uniqueness
-            print("ticket_type.enforce_unique_email Before", ticket_type.enforce_unique_email)
-            if ticket_type.enforce_unique_email:
-                print("ticket_type.enforce_unique_email Inside", ticket_type.enforce_unique_email)
-                exists = Invitation.objects.filter(
-                    guest_email=email,
-                    ticket_type=ticket_type
-                ).exists()
-
-                if exists:
-                    # Log duplicate
-                    DuplicateRecord.objects.create(
-                        user=self.user,
-                        guest_email=email,
-                        job=getattr(self, "_bulk_job", None),
-                        ticket_type=ticket_type,
-                        detection_source="db_check",
-                        scope="ticket",
-                        reason=f"Email already exists for this ticket: {ticket_name}"
-                    )
-                    raise ValidationError(f"Duplicate email for ticket type '{ticket_name}'")
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_email_key = (instance.__dict__.get("guest_email"), instance.__dict__.get("ticket_type_id"))
+        return instance
 
-        return super().save(*args, **kwargs)
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        email_key = (self.guest_email, self.ticket_type_id)
+        # Recompute enforced_email only when the pair is new or changed, so rows left
+        # as duplicates when the ticket's flag was turned on can still be saved.
+        # _loaded_email_key keeps the previous pair until post_save has run (signals).
+        if adding or email_key != getattr(self, "_loaded_email_key", email_key):
+            self._save_enforced_email(adding, *args, **kwargs)
+        else:
+            super().save(*args, **kwargs)
+        self._loaded_email_key = email_key
+
+    def _save_enforced_email(self, adding, *args, **kwargs):
+        self.enforced_email = enforced_email_for(self.guest_email, self.ticket_type)
+        if kwargs.get("update_fields") is not None:
+            kwargs["update_fields"] = {*kwargs["update_fields"], "enforced_email"}
+        if not self.enforced_email:
+            return super().save(*args, **kwargs)
+
+        try:
+            with transaction.atomic():
+                super().save(*args, **kwargs)
+        except IntegrityError:
+            taken = Invitation.objects.filter(
+                enforced_email=self.enforced_email, ticket_type_id=self.ticket_type_id
+            ).exclude(pk=self.pk).exists()
+            if not taken:
+                raise
+            ticket_name = self.ticket_type.name.lower()
+            if adding:
+                self.pk = None
+                # Log duplicate
+                DuplicateRecord.objects.create(
+                    user=self.user,
+                    guest_email=self.enforced_email,
+                    job=getattr(self, "_bulk_job", None),
+                    ticket_type=self.ticket_type,
+                    detection_source="db_check",
+                    scope="ticket",
+                    reason=f"Email already exists for this ticket: {ticket_name}"
+                )
+            raise ValidationError(f"Duplicate email for ticket type '{ticket_name}'")
 
 class InvitationLinkUsage(models.Model):
     """
@@ -5,15 +5,15 @@ import django
 django.setup()
 
 from invitations.utils.redis_utils import get_redis
-import orjson
+from invitations.utils.row_codec import decode_row
 from collections import Counter
 
 def find_duplicate_rows(job_id, field="row_number"):
     r = get_redis()
     key = f"bulk:job:{job_id}:rows"
-    rows_raw = r.lrange(key, 0, -1)
+    rows_raw = r.hvals(key)
 
-    rows = [orjson.loads(row) for row in rows_raw]
+    rows = [decode_row(row) for row in rows_raw]
 
     values = []
     for row in rows:
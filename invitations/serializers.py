@@ -6,6 +6,7 @@ from uuid import uuid4
 
 from adminapp.models import TicketType
 from invitations.utils.email_uniqueness_validator import check_email_uniqueness
+from invitations.utils.quota_service import reserve_quota, commit_quota, release_quota, add_registered
 from .models import Invitation
 from invitations.models import (
     InvitationStats, 
@@ -144,37 +145,37 @@ class InvitationLinkGenerateSerializer(serializers.ModelSerializer):
         base_url = config("FRONTEND_URL", "http://178.18.253.63:3010/invite/register")
         links_needed = validated_data.pop("links_needed", 1)
 
-        stats, _ = InvitationStats.objects.select_for_update().get_or_create(id=1)
-
-        with transaction.atomic():
-            stats.refresh_from_db()
-
-            if stats.remaining_invitations < links_needed:
-                raise serializers.ValidationError({
-                    "detail": f"Not enough invitations left. You have only {stats.remaining_invitations} remaining."
-                })
-
-            invitations = []
-            for _ in range(links_needed):
-                link_code = uuid4()
-                invitations.append(
-                    Invitation(
-                        user=user,
-                        source_type="link",
-                        link_code=link_code,
-                        invitation_url=f"{base_url}/{link_code}",
-                        **validated_data,
+        ok, remaining, reservation = reserve_quota(links_needed)
+        if not ok:
+            raise serializers.ValidationError({
+                "detail": f"Not enough invitations left. You have only {remaining} remaining."
+            })
+
+        try:
+            with transaction.atomic():
+                invitations = []
+                for _ in range(links_needed):
+                    link_code = uuid4()
+                    invitations.append(
+                        Invitation(
+                            user=user,
+                            source_type="link",
+                            link_code=link_code,
+                            invitation_url=f"{base_url}/{link_code}",
+                            **validated_data,
+                        )
                     )
-                )
-                stats.generated_invitations += links_needed
 
-            Invitation.objects.bulk_create(invitations, batch_size=1000)
+                Invitation.objects.create_many(invitations, batch_size=1000)
+        except Exception:
+            release_quota(reservation)
+            raise
 
-            stats.update_remaining()
+        remaining = commit_quota(reservation, links_needed)
 
         return {
             "total_created": links_needed,
-            "remaining": stats.remaining_invitations,
+            "remaining": remaining,
         }
 
 
@@ -238,9 +239,7 @@ class InvitationLinkRegisterSerializer(serializers.Serializer):
             invitation.usage_count = F("usage_count") + 1
             invitation.save(update_fields=["usage_count"])
 
-            stats, _ = InvitationStats.objects.select_for_update().get_or_create(id=1)
-            stats.registered_visitors = F("registered_visitors") + 1
-            stats.save(update_fields=["registered_visitors"])
+            transaction.on_commit(add_registered)
 
             return existing_usage
 
@@ -253,9 +252,7 @@ class InvitationLinkRegisterSerializer(serializers.Serializer):
         invitation.save(update_fields=["usage_count"])
 
         # Update stats
-        stats, _ = InvitationStats.objects.select_for_update().get_or_create(id=1)
-        stats.registered_visitors = F("registered_visitors") + 1
-        stats.save(update_fields=["registered_visitors"])
+        transaction.on_commit(add_registered)
 
         return usage
 
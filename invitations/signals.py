@@ -0,0 +1,33 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from adminapp.models import TicketType
+from invitations.models import Invitation
+from invitations.utils.redis_utils import bump_version
+from invitations.utils.validation_cache import TICKET_TYPES_VERSION, bump_invitation_versions
+
+
+@receiver([post_save, post_delete], sender=TicketType)
+def ticket_type_changed(sender, **kwargs):
+    """Ticket config changed: cached bulk validations are no longer trustworthy."""
+    bump_version(TICKET_TYPES_VERSION)
+
+
+@receiver(post_save, sender=Invitation)
+def invitation_saved(sender, instance, created, update_fields=None, **kwargs):
+    """
+    A new invitation, or one whose email or ticket changed, may turn cached 'valid'
+    rows into DB duplicates (or back). Both the old and the new ticket type are bumped.
+    """
+    previous = getattr(instance, "_loaded_email_key", None)
+    if not created:
+        if update_fields is not None and not {"guest_email", "ticket_type"} & set(update_fields):
+            return
+        if previous == (instance.guest_email, instance.ticket_type_id):
+            return
+    bump_invitation_versions({instance.ticket_type_id, previous[1] if previous else None})
+
+
+@receiver(post_delete, sender=Invitation)
+def invitation_deleted(sender, instance, **kwargs):
+    bump_invitation_versions({instance.ticket_type_id})
@@ -0,0 +1,29 @@
+import logging
+
+from celery import shared_task
+from celery.signals import worker_ready
+
+from invitations.deduplication.bloom_manager import warm_bloom_filters
+from invitations.utils.redis_utils import get_redis
+
+bloom_logger = logging.getLogger("django")
+
+# Workers started together warm the filters once
+WARM_LOCK_KEY = "bloom:warm:lock"
+WARM_LOCK_TTL = 300
+
+
+@shared_task
+def warm_bloom_filters_task(namespace="invite"):
+    loaded = warm_bloom_filters(namespace)
+    bloom_logger.info(f"Bloom filters warmed: {loaded}")
+    return loaded
+
+
+@worker_ready.connect
+def warm_bloom_filters_on_startup(sender=None, **kwargs):
+    try:
+        if get_redis().set(WARM_LOCK_KEY, 1, nx=True, ex=WARM_LOCK_TTL):
+            warm_bloom_filters_task.delay()
+    except Exception as e:
+        bloom_logger.error(f"Bloom filter warm-up not queued: {e}")
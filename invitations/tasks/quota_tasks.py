@@ -0,0 +1,9 @@
+from celery import shared_task
+
+from invitations.utils.quota_service import reconcile_quota
+
+
+@shared_task
+def reconcile_quota_task():
+    """Beat task: copy the Redis quota counters to the InvitationStats row."""
+    return reconcile_quota()
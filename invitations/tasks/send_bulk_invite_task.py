@@ -1,16 +1,30 @@
-from celery import shared_task
-from invitations.models import BulkUploadJob, Invitation, InvitationStats
+from celery import shared_task, chord, group
+from invitations.models import BulkUploadJob, Invitation
 from adminapp.models import TicketType, DuplicateRecord
-from invitations.utils.redis_utils import get_redis, delete_rows_key
-from invitations.deduplication.dedup_service import DeduplicationService
-from invitations.deduplication.utils import resolve_dedup_scope
-from ..utils.bulk_email_uniqueness_validator import load_ticket_email_validation_context
+from invitations.utils.redis_utils import (
+    get_redis, delete_rows_key, iter_row_batches, count_rows, ensure_row_index, split_row_ids,
+    set_send_params, mark_rows_sent, unsent_row_ids,
+)
+from invitations.utils.quota_service import commit_quota, release_quota
+from ..utils.bulk_email_uniqueness_validator import load_ticket_email_validation_context, EXISTING_LOOKUP_CHUNK
 from decouple import config
 import orjson
+import redis
 import uuid
 from django.core.exceptions import ValidationError
+from django.db import transaction, OperationalError
 
 BATCH_CREATE = 5000  # Batch size for creating invitations
+BULK_INSERT_BATCH = config("BULK_INSERT_BATCH", cast=int, default=1000)  # rows per INSERT statement
+# Jobs with at least this many valid rows are sent as a chord of BATCH_CREATE chunks (0 = never)
+SEND_FANOUT_MIN_ROWS = config("BULK_SEND_FANOUT_MIN_ROWS", cast=int, default=0)
+SEND_MAX_RETRIES = config("BULK_SEND_MAX_RETRIES", cast=int, default=3)
+# Quota held for a confirmed job; every committed chunk extends it by this much
+SEND_RESERVATION_TTL = config("BULK_QUOTA_RESERVATION_TTL", cast=int, default=15 * 60)
+RETRYABLE_ERRORS = (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError, OperationalError)
+
+# Namespace of the deterministic bulk link codes (uuid5 of "job_id:row_id")
+LINK_CODE_NAMESPACE = uuid.UUID("8db65738-d373-449c-b787-28573c6820e0")
 
 
 import logging
@@ -20,72 +34,65 @@ send_bulk_invite_logger = logging.getLogger("django")
 # ==============================
 
 def get_bulk_job_and_setup(job_id):
-    """Fetch BulkUploadJob, set status, and prepare dedup service + Redis."""
+    """Fetch BulkUploadJob and set its status to sending."""
     job = BulkUploadJob.objects.get(id=job_id)
     job.status = BulkUploadJob.STATUS_SENDING
     job.save(update_fields=["status"])
+    return job
 
-    # dedup = DeduplicationService(namespace=f"bulk:{job_id}")
-    #Common for all
-    dedup = DeduplicationService(namespace=f"invite")
-    send_bulk_invite_logger.info(f"✅ DeduplicationService initialised for Job id: {job_id}")
 
-    redis_client = get_redis()
-    return job, dedup, redis_client
+def fetch_rows_from_redis(job_id, batch_size=BATCH_CREATE):
+    """Lazily stream the valid rows of a job from Redis, `batch_size` rows at a time."""
+    return iter_row_batches(job_id, batch_size, status="valid")
 
 
-def fetch_rows_from_redis(redis_client, job_id):
-    """Fetch and parse all valid rows from Redis for a given job."""
-    key = f"bulk:job:{job_id}:rows"
-    rows_dict = redis_client.hgetall(key)
-    return [orjson.loads(value) for value in rows_dict.values()], key
+def send_chunks_key(job_id):
+    """HASH "start_id:stop_id" -> result of the finished chunks of a fanned-out send."""
+    return f"bulk:job:{job_id}:send:chunks"
 
 
-def prepare_invitation_data(job):
-    """Precompute all necessary context for invitation creation."""
-    BASE_URL = config("FRONTEND_INVITE_URL", "http://178.18.253.63:3010/invite/")
-    ticket_map = {t.name.lower(): t.id for t in TicketType.objects.filter(is_active=True)}
-    stats, _ = InvitationStats.objects.get_or_create(id=1)
+def job_reservation(job_id):
+    """Name of the quota reservation a confirmed job sends against."""
+    return f"bulk:{job_id}"
 
-    existing_raw = Invitation.objects.values_list(
-        "guest_email", "ticket_type__name"
-    )
-    existing_global = {email.lower() for email, _ in existing_raw if email}
-    existing_ticket = {(email.lower(), (t or "").lower()) for email, t in existing_raw if email and t}
-
-    ticket_cache = load_ticket_email_validation_context()
-    return BASE_URL, ticket_map, stats, existing_global, existing_ticket, ticket_cache
 
+def invitation_link_code(job_id, row_id):
+    """Link code of a job row: the same row always maps to the same invitation."""
+    return uuid.uuid5(LINK_CODE_NAMESPACE, f"{job_id}:{row_id}")
 
-def handle_deduplication(job, dedup, email, ticket_name, scope):
-    """Check and log duplicates using the dedup service."""
 
-    send_bulk_invite_logger.debug(f"SCOPE RECEIVED IN handle_deduplication : {scope}")
-    is_dup = False
-    if scope != "none":
-        is_dup = dedup.is_duplicate(
-            user_id=job.user.id,
-            email=email,
-            ticket_type=ticket_name if scope == "ticket" else "",
-        )
-        # if is_dup:
-        #     DuplicateRecord.objects.create(
-        #         user=job.user,
-        #         job=job,
-        #         guest_email=email,
-        #         ticket_type=TicketType.objects.filter(name__iexact=ticket_name).first(),
-        #         detection_source="dedup_service",
-        #         scope=scope,
-        #         reason=f"Duplicate {scope} for {email} ({ticket_name}) detected by dedup service",
-        #     )
-    return is_dup
+def prepare_invitation_data(job):
+    """Precompute the context for invitation creation: (BASE_URL, ticket_map, ticket_cache)."""
+    BASE_URL = config("FRONTEND_INVITE_URL", "http://178.18.253.63:3010/invite/")
+    ticket_map = {t.name.lower(): t.id for t in TicketType.objects.filter(is_active=True)}
+    ticket_cache = load_ticket_email_validation_context()
+    return BASE_URL, ticket_map, ticket_cache
+
+
+def duplicate_record(job, email, ticket_type_id, ticket_name, reason):
+    """Unsaved DuplicateRecord for a row rejected before insert."""
+    return DuplicateRecord(
+        user=job.user,
+        job=job,
+        guest_email=email,
+        ticket_type_id=ticket_type_id,
+        detection_source="db_check",
+        scope="ticket",
+        reason=reason,
+    )
 
 
 def create_invitation_objects(chunk, job, BASE_URL, ticket_map, ticket_cache,
-                              existing_global, existing_ticket,
-                              dedup, expire_date, default_message):
-    """Core logic to process a chunk of rows and prepare Invitation objects."""
+                              expire_date, default_message, seen=None):
+    """
+    Core logic to process a chunk of rows and prepare Invitation objects.
+    Pairs already queued earlier in this job (`seen`, updated in place) are
+    filtered here, in memory; pairs already in the DB are left to create_many.
+    Returns (invites_to_create, duplicate_records).
+    """
     invites_to_create = []
+    rejected = []
+    seen = set() if seen is None else seen
 
     for row in chunk:   
         if row.get("status") != "valid":
@@ -99,23 +106,11 @@ def create_invitation_objects(chunk, job, BASE_URL, ticket_map, ticket_cache,
             continue
 
         email = row["guest_email"].lower()
-        unique_code = uuid.uuid4()
+        unique_code = invitation_link_code(job.id, row["id"])
         invite_url = f"{BASE_URL}{unique_code}"
         key_ticket = (email, ticket_name)
 
-        send_bulk_invite_logger.info(f"🔑 Processing Guest: Email={email}, Ticket={ticket_name}")
-
-        # Determine dedup scope
-        # scope = resolve_dedup_scope(ticket_name, ticket_cache)
-        # send_bulk_invite_logger.info(f"🎯 Dedup Scope for Ticket '{ticket_name}' → {scope}")
-
-        # # Perform dedup check
-        # is_dup = handle_deduplication(job, dedup, email, ticket_name, scope)
-        # send_bulk_invite_logger.info(f"📌 Dedup Result for ({email}, {ticket_name}, scope={scope}) → is_dup={is_dup}")
-
-        # if is_dup:
-        #     send_bulk_invite_logger.warning(f"🚫 Skipping — Deduplication detected duplicate → {email} / {ticket_name}")
-        #     continue
+        send_bulk_invite_logger.debug(f"🔑 Processing Guest: Email={email}, Ticket={ticket_name}")
 
         # DB-level duplicate fallback filter
         ticket_type_obj = ticket_cache.get(ticket_name) if ticket_cache else None
@@ -128,11 +123,15 @@ def create_invitation_objects(chunk, job, BASE_URL, ticket_map, ticket_cache,
         if enforce_unique:
             send_bulk_invite_logger.debug(f"🔒 Ticket '{ticket_name}' enforces unique email")
 
-        if enforce_unique and key_ticket in existing_ticket:
-            send_bulk_invite_logger.warning(
-                f"🚫 DB Duplicate detected (already exists): {key_ticket} — Skipping"
-            )
+        if enforce_unique and key_ticket in seen:
+            send_bulk_invite_logger.warning(f"🚫 Duplicate within job: {key_ticket} — Skipping")
+            rejected.append(duplicate_record(
+                job, email, ticket_type_id, ticket_name,
+                f"Email repeated in this upload for ticket: {ticket_name}",
+            ))
             continue
+        if enforce_unique:
+            seen.add(key_ticket)
 
         # Create invitation object
         invite = Invitation(
@@ -152,128 +151,299 @@ def create_invitation_objects(chunk, job, BASE_URL, ticket_map, ticket_cache,
         )
         invites_to_create.append(invite)
 
-        send_bulk_invite_logger.info(f"✅ Invitation queued for creation: {email} ({ticket_name})")
+        send_bulk_invite_logger.debug(f"✅ Invitation queued for creation: {email} ({ticket_name})")
 
-    send_bulk_invite_logger.info(f"🎉 Total invitations prepared in this chunk: {len(invites_to_create)}")
-    return invites_to_create
+    send_bulk_invite_logger.info(
+        f"🎉 Total invitations prepared in this chunk: {len(invites_to_create)}, rejected: {len(rejected)}"
+    )
+    return invites_to_create, rejected
 
 
 
-def bulk_create_invitations(invites_to_create, created_total, pending_total):
-    """Try to bulk create invitations, fallback to individual save on error."""
-    try:
-        Invitation.objects.bulk_create(
-            invites_to_create,
-            batch_size=BATCH_CREATE,
-            ignore_conflicts=True
+def drop_sent_rows(job, chunk):
+    """
+    Drop rows already committed by an earlier run of this job. The Redis ledger
+    is checked first; the rest are checked by their deterministic link code in
+    the DB, which covers a crash between a commit and its ledger write.
+    """
+    unsent = set(unsent_row_ids(job.id, [row["id"] for row in chunk]))
+    chunk = [row for row in chunk if row["id"] in unsent]
+
+    codes = [invitation_link_code(job.id, row["id"]) for row in chunk]
+    existing = set()
+    for start in range(0, len(codes), EXISTING_LOOKUP_CHUNK):
+        existing.update(
+            Invitation.objects.filter(link_code__in=codes[start:start + EXISTING_LOOKUP_CHUNK])
+            .values_list("link_code", flat=True)
         )
-        created_total += len(invites_to_create)
+    if not existing:
+        return chunk
+    send_bulk_invite_logger.warning(f"♻️ Skipping {len(existing)} rows sent by an earlier run")
+    mark_rows_sent(job.id, [row["id"] for row, code in zip(chunk, codes) if code in existing])
+    return [row for row, code in zip(chunk, codes) if code not in existing]
+
+
+def bulk_create_invitations(invites_to_create, created_total, pending_total, job=None):
+    """
+    Insert a chunk of invitations with Invitation.objects.create_many: one set-based
+    duplicate check, multi-row INSERTs and one DuplicateRecord insert, all in one
+    transaction. If that fails, falls back to individual saves (which re-run the
+    model duplicate check). Returns (created_total, pending_total, duplicates).
+    """
+    if not invites_to_create:
+        return created_total, pending_total, 0
+
+    try:
+        with transaction.atomic():
+            created, duplicates = Invitation.objects.create_many(
+                invites_to_create, job=job, batch_size=BULK_INSERT_BATCH
+            )
+        created_total += len(created)
         send_bulk_invite_logger.info(
-            f"✅ Bulk created {len(invites_to_create)} invitations successfully."
+            f"✅ Bulk created {len(created)} invitations successfully, {len(duplicates)} DB duplicates."
         )
+        return created_total, pending_total, len(duplicates)
 
     except Exception as e:
         send_bulk_invite_logger.error(
             f"⚠️ Bulk create failed — switching to individual save mode. Error: {e}"
         )
 
-        for invite in invites_to_create:
-            try:
+    duplicates = 0
+    for invite in invites_to_create:
+        invite.pk = None
+        invite._bulk_job = job  # ✅ attach job reference for logging
+        try:
+            with transaction.atomic():
                 invite.save()
-                created_total += 1
-                send_bulk_invite_logger.debug(
-                    f"✅ Individually created invitation for {invite.guest_email}"
-                )
+            created_total += 1
+            send_bulk_invite_logger.debug(
+                f"✅ Individually created invitation for {invite.guest_email}"
+            )
+
+        except ValidationError:
+            # Duplicate found by Invitation.save(), already logged to DuplicateRecord
+            duplicates += 1
+
+        except Exception as inner_err:
+            send_bulk_invite_logger.error(
+                f"❌ Individual create failed for {invite.guest_email} — marking as pending. Error: {inner_err}"
+            )
+
+            # Mark as pending when direct save fails
+            invite.status = "pending"
+            invite.is_sent = False
+            invite.save(force_insert=True)
+            pending_total += 1
+
+    return created_total, pending_total, duplicates
+
+
+
+def add_generated_invitations(job_id, count):
+    """Once the chunk commits, count its invitations against the job's quota reservation."""
+    if count:
+        transaction.on_commit(
+            lambda: commit_quota(job_reservation(job_id), count, keep_ttl=SEND_RESERVATION_TTL)
+        )
 
-            except Exception as inner_err:
-                send_bulk_invite_logger.error(
-                    f"❌ Individual create failed for {invite.guest_email} — marking as pending. Error: {inner_err}"
-                )
 
-                # Mark as pending when direct save fails
-                invite.status = "pending"
-                invite.is_sent = False
-                invite.save(force_insert=True)
-                pending_total += 1
+def send_invite_chunk(job, chunk, context, expire_date, default_message, seen):
+    """
+    Filter, log and insert the invitations of one chunk of valid rows, skipping
+    rows an earlier run already committed. Returns (created, pending, duplicates).
+    """
+    BASE_URL, ticket_map, ticket_cache = context
+    chunk = drop_sent_rows(job, chunk)
+    if not chunk:
+        return 0, 0, 0
 
-    return created_total, pending_total
+    invites_to_create, rejected = create_invitation_objects(
+        chunk, job, BASE_URL, ticket_map, ticket_cache,
+        expire_date, default_message, seen=seen
+    )
+
+    # Rejects, invitations and counters commit together, then the rows go in the ledger
+    with transaction.atomic():
+        if rejected:
+            DuplicateRecord.objects.bulk_create(rejected, batch_size=BULK_INSERT_BATCH)
+        created, pending, duplicates = bulk_create_invitations(invites_to_create, 0, 0, job=job)
+        # pending invitations are stored too, so they use quota like created ones
+        add_generated_invitations(job.id, created + pending)
+    row_ids = [row["id"] for row in chunk]
+    transaction.on_commit(lambda: mark_rows_sent(job.id, row_ids))
+    return created, pending, len(rejected) + duplicates
 
 
+def complete_send_job(job_id):
+    job = BulkUploadJob.objects.get(id=job_id)
+    job.status = BulkUploadJob.STATUS_COMPLETED
+    job.save(update_fields=["status", "updated_at"])
+    delete_rows_key(job_id)
+    # rows that turned out to be duplicates give their quota back
+    release_quota(job_reservation(job_id))
+
+
+def fail_send_job(job_id, error):
+    job = BulkUploadJob.objects.filter(id=job_id).first()
+    if job:
+        job.status = BulkUploadJob.STATUS_FAILED
+        job.error_note = str(error)
+        job.save(update_fields=["status", "error_note", "updated_at"])
+    release_quota(job_reservation(job_id))
+
+
+def dispatch_bulk_invite(job_id, expire_date, default_message, valid_count=0):
+    """
+    Start (or resume) sending a confirmed job: one sequential task, or for jobs of
+    at least BULK_SEND_FANOUT_MIN_ROWS valid rows a chord of row-range chunk tasks.
+    Rows in the job's send ledger are skipped, so a resumed send only does the rest.
+    """
+    job_id = str(job_id)
+    set_send_params(job_id, expire_date=expire_date, default_message=default_message)
+    ranges = []
+    if SEND_FANOUT_MIN_ROWS and valid_count >= SEND_FANOUT_MIN_ROWS:
+        ranges = split_row_ids(job_id, BATCH_CREATE, status="valid")
+    if len(ranges) < 2:
+        return send_bulk_invite.delay(job_id, expire_date, default_message)
+
+    BulkUploadJob.objects.filter(id=job_id).update(status=BulkUploadJob.STATUS_SENDING)
+    chunks = group(
+        send_bulk_invite_chunk_task.s(job_id, index, start_id, stop_id, expire_date, default_message)
+        for index, (start_id, stop_id) in enumerate(ranges)
+    )
+    callback = finalize_bulk_invite_task.s(job_id).on_error(mark_bulk_invite_failed_task.si(job_id))
+    return chord(chunks)(callback)
+
 
 # ==============================
 # 🔹 MAIN TASK
 # ==============================
  
 
-@shared_task(bind=True)
+@shared_task(bind=True, acks_late=True, reject_on_worker_lost=True, max_retries=SEND_MAX_RETRIES)
 def send_bulk_invite(self, job_id, expire_date, default_message):
-    """Main Celery Task: send invites for valid rows after user confirms."""
+    """
+    Main Celery Task: send invites for valid rows after user confirms.
+    Committed rows are recorded in the job's send ledger, so a retry or a
+    resumed job (see dispatch_bulk_invite) skips them.
+    """
     try:
+        set_send_params(job_id, expire_date=expire_date, default_message=default_message)
         send_bulk_invite_logger.info(f"Bulk invite started for Job id: {job_id}")
         print("SENDING BUK INVITESSSSS")
-        job, dedup, redis_client = get_bulk_job_and_setup(job_id)
-        rows, redis_key = fetch_rows_from_redis(redis_client, job_id)
-        BASE_URL, ticket_map, stats, existing_global, existing_ticket, ticket_cache = prepare_invitation_data(job)
+        job = get_bulk_job_and_setup(job_id)
+        context = prepare_invitation_data(job)
 
-        total = len(rows)
+        ensure_row_index(job_id)
+        total = count_rows(job_id, status="valid")["total_count"]
         created_total = 0
         pending_total = 0
+        duplicate_total = 0
+        seen = set()  # (email, ticket) pairs queued so far in this job
 
-        for start in range(0, total, BATCH_CREATE):
-            end = start + BATCH_CREATE
-            chunk = rows[start:end]
+        for batch_no, chunk in enumerate(fetch_rows_from_redis(job_id), start=1):
+            start = (batch_no - 1) * BATCH_CREATE
+            end = start + len(chunk)
 
             # ✅ Log batch start
             send_bulk_invite_logger.info(
-                f"📦 Processing batch {start//BATCH_CREATE + 1}: rows {start} → {min(end, total)} (total: {total})"
+                f"📦 Processing batch {batch_no}: rows {start} → {end} (total: {total})"
             )
 
 
 
-            invites_to_create = create_invitation_objects(
-                chunk, job, BASE_URL, ticket_map, ticket_cache,
-                existing_global, existing_ticket,
-                dedup, expire_date, default_message
+            created, pending, duplicates = send_invite_chunk(
+                job, chunk, context, expire_date, default_message, seen
             )
-
-            # created_total, pending_total = bulk_create_invitations(invites_to_create, created_total, pending_total)
-            for invite in invites_to_create:
-                invite._bulk_job = job  # ✅ attach job reference for logging
-                try:
-                    invite.save()
-                    created_total += 1
-                except ValidationError:
-                    pending_total += 1
-
+            created_total += created
+            pending_total += pending
+            duplicate_total += duplicates
 
             send_bulk_invite_logger.info(
-                f"✅ Batch {start//BATCH_CREATE + 1} completed → Created: {created_total}, Pending: {pending_total}"
+                f"✅ Batch {batch_no} completed → Created: {created_total}, Pending: {pending_total}"
             )
-            # Update stats
-            stats.generated_invitations += len(invites_to_create)
-            stats.remaining_invitations = max(stats.allocated_invitations - stats.generated_invitations, 0)
-            stats.save(update_fields=["generated_invitations", "remaining_invitations"])
-
-            self.update_state(state="PROGRESS", meta={"created": created_total, "pending": pending_total})
+            self.update_state(state="PROGRESS", meta={
+                "created": created_total, "pending": pending_total, "duplicates": duplicate_total
+            })
             print(f"Created {created_total} active, {pending_total} pending so far...")
 
         # Job completion
-        job.status = BulkUploadJob.STATUS_COMPLETED
-        job.save(update_fields=["status", "updated_at"])
-        delete_rows_key(job_id)
+        complete_send_job(job_id)
 
         print(f"Job {job_id} completed — {created_total} active, {pending_total} pending.")
-        return {"created": created_total, "pending": pending_total}
+        return {"created": created_total, "pending": pending_total, "duplicates": duplicate_total}
+
+    except RETRYABLE_ERRORS as e:
+        if self.request.retries < self.max_retries:
+            raise self.retry(exc=e, countdown=2 ** self.request.retries)
+        fail_send_job(job_id, e)
+        raise
 
     except Exception as e:
         print(f"Error in bulk job {job_id}: {e}")
-        job = BulkUploadJob.objects.filter(id=job_id).first()
-        if job:
-            job.status = BulkUploadJob.STATUS_FAILED
-            job.error_note = str(e)
-            job.save(update_fields=["status"])
+        fail_send_job(job_id, e)
         raise
 
 
+@shared_task(bind=True, acks_late=True, reject_on_worker_lost=True, max_retries=SEND_MAX_RETRIES)
+def send_bulk_invite_chunk_task(self, job_id, chunk_index, start_id, stop_id, expire_date, default_message):
+    """
+    Chord member: send the valid rows with ids in [start_id, stop_id).
+    Idempotent — a finished chunk is recorded in Redis and returns its stored
+    result, and the send ledger makes a half-done retry skip its committed rows.
+    """
+    r = get_redis()
+    chunk_field = f"{start_id}:{stop_id}"
+    done = r.hget(send_chunks_key(job_id), chunk_field)
+    if done:
+        return orjson.loads(done)
+
+    try:
+        job = BulkUploadJob.objects.select_related("user").get(id=job_id)
+        context = prepare_invitation_data(job)
+
+        created_total = pending_total = duplicate_total = 0
+        seen = set()
+        for chunk in iter_row_batches(job_id, BATCH_CREATE, status="valid", start_id=start_id, stop_id=stop_id):
+            created, pending, duplicates = send_invite_chunk(
+                job, chunk, context, expire_date, default_message, seen
+            )
+            created_total += created
+            pending_total += pending
+            duplicate_total += duplicates
+
+        result = {
+            "chunk": chunk_index, "created": created_total,
+            "pending": pending_total, "duplicates": duplicate_total,
+        }
+        r.hset(send_chunks_key(job_id), chunk_field, orjson.dumps(result))
+        send_bulk_invite_logger.info(f"✅ Job {job_id} chunk {chunk_index} completed → {result}")
+        return result
+
+    except RETRYABLE_ERRORS as e:
+        if self.request.retries < self.max_retries:
+            raise self.retry(exc=e, countdown=2 ** self.request.retries)
+        raise
+
+
+@shared_task
+def finalize_bulk_invite_task(chunk_results, job_id):
+    """Chord callback: every chunk is in, complete the job and drop its rows."""
+    complete_send_job(job_id)
+    result = {
+        key: sum(res[key] for res in chunk_results)
+        for key in ("created", "pending", "duplicates")
+    }
+    send_bulk_invite_logger.info(f"Job {job_id} completed — {result}")
+    return result
+
+
+@shared_task
+def mark_bulk_invite_failed_task(job_id):
+    """Chord error callback for a fanned-out send."""
+    fail_send_job(job_id, "One or more invitation chunks failed.")
+
+
 
 
@@ -1,174 +1,363 @@
 import csv
-# import json
-from celery import shared_task, current_task
-from adminapp.models import TicketType
-from invitations.models import BulkUploadJob, Invitation, InvitationStats
-from invitations.utils.redis_utils import push_row, incr_stats, set_stats, set_status, delete_rows_key, get_redis 
-# from invitations.helpers.bulk_helpers.bulk_validator import validate_row_csv_dict
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import math
-import csv
-
-
-import csv
-from django.core.files.storage import default_storage
-
-
-
-PREVIEW_LIMIT = 50
-BATCH_SIZE = 5000  # batch Redis operations every N rows
-BATCH_CREATE = 5000 
+import io
+from itertools import islice
 
-MAX_THREADS = 15  # adjust per CPU cores
 import orjson
-import math
-import csv
-import io
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from threading import Lock
+import redis
+from celery import shared_task, chord, group
+from decouple import config
 from django.core.files.storage import default_storage
-from celery import shared_task
-from invitations.models import BulkUploadJob, Invitation
+from django.db import OperationalError
+
+from invitations.models import BulkUploadJob
 from invitations.utils.redis_utils import (
-    get_redis, delete_rows_key, get_stats, set_stats, set_status, push_row
+    get_redis, delete_rows_key, set_stats, set_status, get_checkpoint, index_row
 )
-from invitations.utils.validate_row_csv import (
-    load_ticket_types_cache, clear_ticket_types_cache, validate_row_csv_dict
-) 
-from decouple import config
-from ..utils.bulk_email_uniqueness_validator import load_ticket_email_validation_context
+from invitations.utils.validate_row_csv import apply_file_level_duplicate, set_file_level_duplicate
+from invitations.utils.validation_engine import ValidationEngine, BACKEND_PROCESSES
+from invitations.utils.validate_rows_vectorized import validate_rows_vectorized
+from invitations.utils.validation_cache import store_validation_result
+from invitations.utils.row_codec import encode_row, decode_row
+from invitations.utils.dupe_index import (
+    dupes_key, parse_dupe_field, parse_dupe_ids, group_dupe_ids, append_dupe_ids,
+)
+from ..utils.bulk_email_uniqueness_validator import load_ticket_email_validation_context, load_existing_ticket_keys
 
 
 BATCH_SIZE = config("BULK_BATCH_SIZE", cast=int, default=1000)
 MAX_THREADS = config("BULK_MAX_THREADS", cast=int, default=4)
+MAX_PROCESSES = config("BULK_MAX_PROCESSES", cast=int, default=0)  # 0 = os.cpu_count()
+VALIDATION_BACKEND = config("BULK_VALIDATION_BACKEND", default="threads")  # threads | processes | inline
 PREVIEW_LIMIT = config("BULK_PREVIEW_LIMIT", cast=int, default=5)
+# Files at or above this size use the column-wise (pandas) validator; 0 disables it
+VECTORIZED_MIN_BYTES = config("BULK_VECTORIZED_MIN_BYTES", cast=int, default=1024 * 1024)
+# Files at or above this size are split into row-range shards across workers; 0 disables it
+SHARD_MIN_BYTES = config("BULK_SHARD_MIN_BYTES", cast=int, default=0)
+SHARD_ROWS = config("BULK_SHARD_ROWS", cast=int, default=20000)
 
+MAX_RETRIES = config("BULK_VALIDATION_MAX_RETRIES", cast=int, default=3)
+SHARD_DISPATCH_TTL = 24 * 3600
 
+# transient infrastructure errors worth a retry from the last checkpoint
+RETRYABLE_ERRORS = (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError, OperationalError)
 
 
-@shared_task(bind=True)
-def validate_csv_file_task(self, job_id, default_message=None):
+def iter_csv_batches(fh, batch_size=BATCH_SIZE, start_row=1, stop_row=None, offset=None, fieldnames=None):
     """
-    Optimized bulk CSV validator.
-    - Loads ticket types + existing invites once
-    - Uses Redis cache for ticket list
-    - Thread-safe file-level duplicate tracking
-    - Respects global/ticket-level uniqueness rules
+    Lazily read an uploaded CSV in fixed-size batches.
+    Yields (first_row_number, rows) so only one batch is held in memory at a time.
+    `start_row`/`stop_row` (1-based, stop exclusive) restrict it to a row range.
+    With a byte `offset` of row `start_row` (see scan_csv_shards) and the header's
+    `fieldnames`, reading seeks straight to it instead of parsing the rows before it.
     """
-    try:
-        job = BulkUploadJob.objects.get(id=job_id)
-        job.status = BulkUploadJob.STATUS_PROCESSING
-        job.save(update_fields=["status"])
+    if offset is not None:
+        fh.seek(offset)
+    wrapper = io.TextIOWrapper(fh, encoding="utf-8", errors="replace", newline="")
+    reader = csv.DictReader(wrapper, fieldnames=fieldnames) if offset is not None else csv.DictReader(wrapper)
+    if start_row > 1 and offset is None:
+        # parse-only skip, nothing is validated or kept
+        for _ in islice(reader, start_row - 1):
+            pass
+    row_number = start_row
+    while stop_row is None or row_number < stop_row:
+        size = batch_size if stop_row is None else min(batch_size, stop_row - row_number)
+        rows = list(islice(reader, size))
+        if not rows:
+            break
+        yield row_number, rows
+        row_number += len(rows)
+
+
+def _ends_quoted(line, quoted):
+    """
+    Whether a quoted field is still open after `line`, given whether one was open
+    before it. Follows the csv module's default dialect: a quote opens a field only
+    at its start, and "" inside a quoted field is an escaped quote.
+    """
+    field_start = not quoted
+    i, n = 0, len(line)
+    while i < n:
+        c = line[i]
+        if quoted:
+            if c == 0x22:  # "
+                if i + 1 < n and line[i + 1] == 0x22:
+                    i += 1
+                else:
+                    quoted = False
+        elif c == 0x22 and field_start:
+            quoted = True
+            field_start = False
+        else:
+            field_start = c in (0x2C, 0x0D, 0x0A)  # , \r \n
+        i += 1
+    return quoted
 
-        # --- Redis setup ---
-        set_stats(job_id, total_count=0, valid_count=0, invalid_count=0)
-        set_status(job_id, "processing")
-        delete_rows_key(job_id)
-        r = get_redis()
-        pipe = r.pipeline(transaction=False)
 
-        existing_raw = Invitation.objects.values_list(
-            "guest_email", "ticket_type__name"
-        )
+def scan_csv_shards(fh, shard_rows):
+    """
+    One pass over the raw bytes of an upload, without building any rows.
+    Returns (header fieldnames, data row count, byte offset of every shard's first row).
+    A record ends at a newline outside a quoted field, so multi-line fields stay
+    whole; lines without quotes skip the per-byte scan. Blank lines are skipped, as
+    csv.DictReader does.
+    """
+    header = b""
+    fieldnames = None
+    offsets = []
+    total_rows = 0
+    offset = 0
+    record_start = None
+    quoted = False
+    for line in iter(fh.readline, b""):
+        if record_start is None:
+            if fieldnames is not None and not line.strip(b"\r\n"):
+                offset += len(line)
+                continue
+            record_start = offset
+        if quoted or b'"' in line:
+            quoted = _ends_quoted(line, quoted)
+        offset += len(line)
+        if fieldnames is None:
+            header += line
+        if quoted:
+            continue
+
+        if fieldnames is None:
+            text = header.decode("utf-8", errors="replace")
+            fieldnames = next(csv.reader(io.StringIO(text, newline="")), [])
+        else:
+            if total_rows % shard_rows == 0:
+                offsets.append(record_start)
+            total_rows += 1
+        record_start = None
+    return fieldnames, total_rows, offsets
+
+
+def shard_dispatch_key(job_id):
+    """
+    "claimed:<task id>" while a task prepares a job's shards, "dispatched" once the
+    chord is published, so a redelivered task does not wipe and dispatch them again.
+    """
+    return f"bulk:job:{job_id}:shards"
 
 
-        # global & ticket-level caches
-        existing_global = {email.lower() for email, _ in existing_raw if email}
-        existing_ticket = {(email.lower(), (t or "").lower()) for email, t in existing_raw if email and t}
+def claim_shard_dispatch(r, job_id, task_id):
+    """
+    Claim the shard dispatch of a job. The task holding the claim (a retry or a
+    redelivery of it, same task id) may claim again until the chord is published.
+    """
+    claim = f"claimed:{task_id}"
+    if r.set(shard_dispatch_key(job_id), claim, nx=True, ex=SHARD_DISPATCH_TTL):
+        return True
+    return r.get(shard_dispatch_key(job_id)) == claim
 
-        # file-level duplicate trackers (thread-safe)
-        seen_global_dupes = {}
-        seen_ticket_dupes = {}
-        seen_lock = Lock()
 
-        # --- Read uploaded CSV ---
+def release_shard_dispatch(job_id, task_id):
+    """Give back a claim whose chord was never published (best effort: the claim also times out)."""
+    try:
+        r = get_redis()
+        if r.get(shard_dispatch_key(job_id)) == f"claimed:{task_id}":
+            r.delete(shard_dispatch_key(job_id))
+    except RETRYABLE_ERRORS:
+        pass
+
+
+def batch_emails(rows):
+    """Normalised emails of a CSV batch, as validate_row_csv_dict reads them."""
+    return {(row.get("Email") or row.get("email") or "").strip().lower() for row in rows}
+
+
+def validated_batches(fh, ticket_cache, seen_ticket_dupes, default_message=None,
+                      vectorized=False, start_row=1, stop_row=None, offset=None, fieldnames=None):
+    """Yield validated row_objs batch by batch, file-level duplicates resolved."""
+    csv_batches = iter_csv_batches(fh, BATCH_SIZE, start_row, stop_row, offset=offset, fieldnames=fieldnames)
+    if vectorized:
+        for start, chunk in csv_batches:
+            yield validate_rows_vectorized(
+                chunk,
+                start,
+                existing_ticket=load_existing_ticket_keys(batch_emails(chunk)),
+                ticket_cache=ticket_cache,
+                seen_ticket_dupes=seen_ticket_dupes,
+                default_message=default_message,
+            )
+        return
+
+    if VALIDATION_BACKEND == BACKEND_PROCESSES:
+        max_workers = MAX_PROCESSES or None
+    else:
+        max_workers = MAX_THREADS
+    engine = ValidationEngine(
+        backend=VALIDATION_BACKEND,
+        max_workers=max_workers,
+        ticket_cache=ticket_cache,
+        default_message=default_message,
+    )
+    with engine:
+        for start, chunk in csv_batches:
+            existing_ticket = load_existing_ticket_keys(batch_emails(chunk))
+            results = engine.validate(chunk, start, existing_ticket=existing_ticket)
+            for row_obj in results:
+                apply_file_level_duplicate(row_obj, ticket_cache, seen_ticket_dupes)
+            yield results
+
+
+def pipeline_batch(pipe, job_id, results, preview):
+    """Queue a validated batch and its stat increments on `pipe`. Returns (valid, invalid)."""
+    batch_valid = batch_invalid = 0
+    for row_obj in results:
+        pipe.hset(f"bulk:job:{job_id}:rows", row_obj["id"], encode_row(row_obj))
+        index_row(pipe, job_id, row_obj)
+        if row_obj["status"] == "valid":
+            batch_valid += 1
+        else:
+            batch_invalid += 1
+            if len(preview) < PREVIEW_LIMIT:
+                preview.append(row_obj)
+
+    pipe.hincrby(f"bulk:job:{job_id}:stats", "total_count", len(results))
+    pipe.hincrby(f"bulk:job:{job_id}:stats", "valid_count", batch_valid)
+    pipe.hincrby(f"bulk:job:{job_id}:stats", "invalid_count", batch_invalid)
+    return batch_valid, batch_invalid
+
+
+def load_dupes(job_id):
+    """Rebuild the file-level duplicate tracker (pair -> first row) from the job's dupe index."""
+    r = get_redis()
+    seen_ticket_dupes = {}
+    for field, ids in r.hscan_iter(dupes_key(job_id), count=BATCH_SIZE):
+        seen_ticket_dupes[parse_dupe_field(field)] = parse_dupe_ids(ids)[0]
+    return seen_ticket_dupes
+
+
+def finish_job(job, total_rows, valid, invalid, preview, cache_key=None):
+    """
+    Persist final counts/preview and flag the job as ready for preview.
+    With a `cache_key`, the validated rows are also kept for identical re-uploads.
+    """
+    job.total_count = total_rows
+    job.valid_count = valid
+    job.invalid_count = invalid
+    job.preview_data = preview[:PREVIEW_LIMIT]
+    job.status = BulkUploadJob.STATUS_PREVIEW_READY
+    job.save(update_fields=[
+        "total_count", "valid_count", "invalid_count",
+        "preview_data", "status", "updated_at"
+    ])
+    set_status(job.id, "done")
+
+    if cache_key:
+        store_validation_result(job.id, cache_key, total_rows, valid, invalid, job.preview_data)
+
+
+def fail_job(job_id, error):
+    set_status(job_id, "failed")
+    job = BulkUploadJob.objects.filter(id=job_id).first()
+    if job is not None:
+        job.status = BulkUploadJob.STATUS_FAILED
+        job.error_note = str(error)
+        job.save(update_fields=["status", "error_note", "updated_at"])
+
+
+@shared_task(bind=True, acks_late=True, reject_on_worker_lost=True, max_retries=MAX_RETRIES)
+def validate_csv_file_task(self, job_id, default_message=None, cache_key=None):
+    """
+    Streaming, resumable bulk CSV validator.
+    - Reads the upload in BATCH_SIZE chunks (flat memory regardless of file size)
+    - Loads ticket types once, existing invites per batch (indexed IN lookup)
+    - Validates on a pluggable engine (BULK_VALIDATION_BACKEND), or column-wise
+      for files above BULK_VECTORIZED_MIN_BYTES
+    - Merges file-level duplicates in row order (deterministic)
+    - Respects global/ticket-level uniqueness rules
+    - Reports bytes consumed as task progress
+    - Checkpoints after every batch; a retry/redelivery resumes from the last one
+    - Files above BULK_SHARD_MIN_BYTES are fanned out as a chord of row-range shards
+    - With a `cache_key`, the result is cached for identical re-uploads
+    """
+    try:
+        job = BulkUploadJob.objects.get(id=job_id)
         file_path = job.uploaded_file.name
-        with default_storage.open(file_path, "rb") as fh:
-            wrapper = io.TextIOWrapper(fh, encoding="utf-8", errors="replace", newline="")
-            reader = list(csv.DictReader(wrapper))
+        total_bytes = default_storage.size(file_path)
+        r = get_redis()
+        checkpoint_key = f"bulk:job:{job_id}:checkpoint"
+        checkpoint = get_checkpoint(job_id)
 
-        total_rows = len(reader)
-        chunk_count = math.ceil(total_rows / BATCH_SIZE)
+        sharded = not checkpoint and bool(SHARD_MIN_BYTES) and total_bytes >= SHARD_MIN_BYTES
+        # A redelivered task must not wipe and re-dispatch shards already running
+        if sharded and not claim_shard_dispatch(r, job_id, self.request.id):
+            return {"job_id": str(job_id), "status": "shards already dispatched"}
 
-        valid = invalid = 0
-        preview = []
+        job.status = BulkUploadJob.STATUS_PROCESSING
+        job.save(update_fields=["status"])
+
+        if checkpoint:
+            # --- Resume after a crash / retry ---
+            start_row = checkpoint["last_row"] + 1
+            total_rows = checkpoint["total_count"]
+            valid = checkpoint["valid_count"]
+            invalid = checkpoint["invalid_count"]
+            preview = orjson.loads(checkpoint["preview"])
+            seen_ticket_dupes = load_dupes(job_id)
+            r.hincrby(f"bulk:job:{job_id}:stats", "resumes", 1)
+            set_status(job_id, "processing")
+        else:
+            # --- Redis setup ---
+            set_stats(job_id, total_count=0, valid_count=0, invalid_count=0, bytes_read=0, total_bytes=total_bytes)
+            set_status(job_id, "processing")
+            delete_rows_key(job_id)
+
+            if sharded:
+                return dispatch_validation_shards(job, default_message, cache_key)
+
+            start_row = 1
+            total_rows = valid = invalid = 0
+            preview = []
+            # file-level duplicate tracker, merged in row order
+            seen_ticket_dupes = {}
 
         ticket_cache = load_ticket_email_validation_context()
-        def process_rows(rows, start_index):
-            results = []
-            for i, row in enumerate(rows, start=start_index):
-                row_obj, _ = validate_row_csv_dict(
-                    row=row,
-                    row_number=i,
-                    # user=job.user,
-                    existing_global=existing_global,
-                    existing_ticket=existing_ticket,
-                    ticket_cache=ticket_cache,
-                    # global_unique_enabled = global_unique_enabled,
-                    seen_global_dupes=seen_global_dupes,
-                    seen_ticket_dupes=seen_ticket_dupes,
-                    seen_lock=seen_lock,
-                    default_message=default_message,
-                )
-                row_obj["id"] = i
-                results.append(row_obj)
-            return results
-
-        # --- Parallel batch validation ---
-        for chunk_index in range(chunk_count):
-            start = chunk_index * BATCH_SIZE + 1
-            chunk = reader[start - 1:start - 1 + BATCH_SIZE]
-            results = []
-
-            with ThreadPoolExecutor(max_workers=MAX_THREADS) as executor:
-                futures = []
-                sub_size = max(1, len(chunk) // MAX_THREADS)
-                for t in range(0, len(chunk), sub_size):
-                    part = chunk[t:t + sub_size]
-                    futures.append(executor.submit(process_rows, part, start + t))
-
-                for f in as_completed(futures):
-                    results.extend(f.result())
-
-            batch_valid = batch_invalid = 0
-            for row_obj in results:
-                pipe.hset(f"bulk:job:{job_id}:rows", row_obj["id"], orjson.dumps(row_obj))
-                if row_obj["status"] == "valid":
-                    valid += 1
-                    batch_valid += 1
-                else:
-                    invalid += 1
-                    batch_invalid += 1
-                    if len(preview) < PREVIEW_LIMIT:
-                        preview.append(row_obj)
-
-            pipe.hincrby(f"bulk:job:{job_id}:stats", "total_count", len(results))
-            pipe.hincrby(f"bulk:job:{job_id}:stats", "valid_count", batch_valid)
-            pipe.hincrby(f"bulk:job:{job_id}:stats", "invalid_count", batch_invalid)
-            pipe.execute()
+        use_vectorized = bool(VECTORIZED_MIN_BYTES) and total_bytes >= VECTORIZED_MIN_BYTES
 
-            # update Celery task progress
-            self.update_state(
-                state="PROGRESS",
-                meta={"processed": start + len(results) - 1, "total": total_rows},
+        # --- Streamed, parallel batch validation ---
+        with default_storage.open(file_path, "rb") as fh:
+            batches = validated_batches(
+                fh, ticket_cache, seen_ticket_dupes,
+                default_message=default_message, vectorized=use_vectorized,
+                start_row=start_row,
             )
+            for results in batches:
+                # rows, stats, dupes and checkpoint land together or not at all
+                pipe = r.pipeline(transaction=True)
+                batch_valid, batch_invalid = pipeline_batch(pipe, job_id, results, preview)
+                append_dupe_ids(dupes_key(job_id), group_dupe_ids(results, ticket_cache), client=pipe)
+                valid += batch_valid
+                invalid += batch_invalid
+                total_rows += len(results)
+
+                bytes_read = fh.tell()
+                pipe.hset(f"bulk:job:{job_id}:stats", "bytes_read", bytes_read)
+                pipe.hset(checkpoint_key, mapping={
+                    "last_row": results[-1]["row_number"],
+                    "total_count": total_rows,
+                    "valid_count": valid,
+                    "invalid_count": invalid,
+                    "preview": orjson.dumps(preview),
+                })
+                pipe.execute()
+
+                # drop the batch before reading the next one
+                del results
+
+                # update Celery task progress
+                self.update_state(
+                    state="PROGRESS",
+                    meta={"processed": total_rows, "bytes_read": bytes_read, "total_bytes": total_bytes},
+                )
 
         # --- Finalize job ---
-        existing_global.clear()
-        existing_ticket.clear()
         ticket_cache.clear()
-
-        job.total_count = total_rows
-        job.valid_count = valid
-        job.invalid_count = invalid
-        job.preview_data = preview[:PREVIEW_LIMIT]
-        job.status = BulkUploadJob.STATUS_PREVIEW_READY
-        job.save(update_fields=[
-            "total_count", "valid_count", "invalid_count",
-            "preview_data", "status", "updated_at"
-        ])
-
-        set_status(job_id, "done")
+        finish_job(job, total_rows, valid, invalid, preview, cache_key)
+        r.delete(checkpoint_key)
 
         return {
             "job_id": str(job.id),
@@ -176,11 +365,162 @@ def validate_csv_file_task(self, job_id, default_message=None):
             "valid": valid,
             "invalid": invalid,
         }
+    except RETRYABLE_ERRORS as e:
+        release_shard_dispatch(job_id, self.request.id)
+        if self.request.retries < self.max_retries:
+            raise self.retry(exc=e, countdown=2 ** self.request.retries)
+        fail_job(job_id, e)
     except Exception as e:
-        job.status = BulkUploadJob.STATUS_FAILED
-        job.status = str(e)
-        job.save(update_fields=[
-            "total_count", "valid_count", "invalid_count",
-            "preview_data", "status", "updated_at"
-        ])
+        release_shard_dispatch(job_id, self.request.id)
+        fail_job(job_id, e)
+
+
+def dispatch_validation_shards(job, default_message=None, cache_key=None):
+    """
+    Split the upload into row-range shards and validate them as a chord.
+    One raw byte scan finds each shard's starting offset, so every shard seeks to
+    its rows instead of parsing the file up to them.
+    """
+    with default_storage.open(job.uploaded_file.name, "rb") as fh:
+        fieldnames, total_rows, offsets = scan_csv_shards(fh, SHARD_ROWS)
+
+    offsets = offsets or [None]
+    shard_count = len(offsets)
+    shards = group(
+        validate_csv_shard_task.s(
+            str(job.id), index, index * SHARD_ROWS + 1, (index + 1) * SHARD_ROWS + 1, default_message,
+            offset=offset, fieldnames=fieldnames,
+        )
+        for index, offset in enumerate(offsets)
+    )
+    callback = finalize_csv_validation_task.s(str(job.id), cache_key).on_error(
+        mark_csv_validation_failed_task.si(str(job.id))
+    )
+    chord(shards)(callback)
+    get_redis().set(shard_dispatch_key(job.id), "dispatched", ex=SHARD_DISPATCH_TTL)
+
+    return {"job_id": str(job.id), "total": total_rows, "shards": shard_count}
+
+
+@shared_task(bind=True, acks_late=True, reject_on_worker_lost=True, max_retries=MAX_RETRIES)
+def validate_csv_shard_task(self, job_id, shard_index, start_row, stop_row, default_message=None,
+                            offset=None, fieldnames=None):
+    """
+    Validates rows [start_row, stop_row) of a job's upload, starting at byte `offset`.
+    Duplicates inside the shard are resolved here; the shard's first-seen
+    (email, ticket) map is left in Redis for the finalize step.
+    A retry redoes the whole shard: row writes are idempotent, its dupe map is
+    rebuilt and the counters are set from the shard results by the finalize step.
+    """
+    try:
+        return validate_csv_shard(job_id, shard_index, start_row, stop_row, default_message, offset, fieldnames)
+    except RETRYABLE_ERRORS as e:
+        # past max_retries this re-raises, and the chord error callback fails the job
+        raise self.retry(exc=e, countdown=2 ** self.request.retries)
+
+
+def validate_csv_shard(job_id, shard_index, start_row, stop_row, default_message=None,
+                       offset=None, fieldnames=None):
+    job = BulkUploadJob.objects.get(id=job_id)
+    r = get_redis()
+    pipe = r.pipeline(transaction=False)
+    shard_dupes_key = f"bulk:job:{job_id}:shard:{shard_index}:dupes"
+    pipe.delete(shard_dupes_key)
+
+    seen_ticket_dupes = {}
+    total_rows = valid = invalid = 0
+    preview = []
+
+    ticket_cache = load_ticket_email_validation_context()
+    with default_storage.open(job.uploaded_file.name, "rb") as fh:
+        use_vectorized = bool(VECTORIZED_MIN_BYTES) and job.uploaded_file.size >= VECTORIZED_MIN_BYTES
+        batches = validated_batches(
+            fh, ticket_cache, seen_ticket_dupes,
+            default_message=default_message, vectorized=use_vectorized,
+            start_row=start_row, stop_row=stop_row, offset=offset, fieldnames=fieldnames,
+        )
+        for results in batches:
+            batch_valid, batch_invalid = pipeline_batch(pipe, job_id, results, preview)
+            append_dupe_ids(shard_dupes_key, group_dupe_ids(results, ticket_cache), client=pipe)
+            valid += batch_valid
+            invalid += batch_invalid
+            total_rows += len(results)
+            pipe.execute()
+            del results
+
+    return {
+        "shard": shard_index,
+        "total": total_rows,
+        "valid": valid,
+        "invalid": invalid,
+        "preview": preview,
+    }
+
+
+@shared_task(bind=True)
+def finalize_csv_validation_task(self, shard_results, job_id, cache_key=None):
+    """
+    Chord callback: merges shard results in shard order, marks rows that
+    duplicate a row from an earlier shard, and publishes the final counts.
+    """
+    try:
+        job = BulkUploadJob.objects.get(id=job_id)
+        r = get_redis()
+        rows_key = f"bulk:job:{job_id}:rows"
+        shard_results = sorted(shard_results, key=lambda res: res["shard"])
+
+        total_rows = sum(res["total"] for res in shard_results)
+        valid = sum(res["valid"] for res in shard_results)
+        invalid = sum(res["invalid"] for res in shard_results)
+        preview = [row for res in shard_results for row in res["preview"]]
+
+        # Shard dupe indexes are appended onto the job's in shard order; a pair that
+        # already had rows from an earlier shard makes every row of this shard a duplicate
+        job_dupes_key = dupes_key(job_id)
+        r.delete(job_dupes_key)
+        for res in shard_results:
+            shard_dupes_key = f"bulk:job:{job_id}:shard:{res['shard']}:dupes"
+            cross_shard = {}
+            groups = {}
+            fields = r.hscan_iter(shard_dupes_key, count=BATCH_SIZE)
+            while True:
+                for field, ids in islice(fields, BATCH_SIZE):
+                    groups[field] = parse_dupe_ids(ids)
+                if not groups:
+                    break
+                previous = append_dupe_ids(job_dupes_key, groups)
+                for ids, first in zip(groups.values(), previous):
+                    if first:
+                        cross_shard.update((row_id, int(first)) for row_id in ids)
+                groups = {}
+            r.delete(shard_dupes_key)
+
+            row_ids = sorted(cross_shard)
+            for start in range(0, len(row_ids), BATCH_SIZE):
+                ids = row_ids[start:start + BATCH_SIZE]
+                pipe = r.pipeline(transaction=False)
+                for row_id, raw in zip(ids, r.hmget(rows_key, ids)):
+                    if raw is None:
+                        continue
+                    old_row = decode_row(raw)
+                    row_obj = decode_row(raw)
+                    if row_obj["status"] == "valid":
+                        valid -= 1
+                        invalid += 1
+                    set_file_level_duplicate(row_obj, cross_shard[row_id])
+                    pipe.hset(rows_key, row_id, encode_row(row_obj))
+                    index_row(pipe, job_id, row_obj, old_row=old_row)
+                pipe.execute()
+
+        set_stats(job_id, total_count=total_rows, valid_count=valid, invalid_count=invalid)
+        finish_job(job, total_rows, valid, invalid, preview, cache_key)
+
+        return {"job_id": job_id, "total": total_rows, "valid": valid, "invalid": invalid}
+    except Exception as e:
+        fail_job(job_id, e)
+
 
+@shared_task
+def mark_csv_validation_failed_task(job_id):
+    """Chord error callback for sharded validation."""
+    fail_job(job_id, "One or more validation shards failed.")
@@ -17,6 +17,7 @@ urlpatterns = [
     path("bulk/<uuid:job_id>/delete/row/<int:row_number>/", views.BulkRowDeleteView.as_view(), name="bulk-delete-row"),
     path("bulk/<uuid:job_id>/rows/clear/", views.BulkClearPreviewView.as_view(), name="bulk-clear-preview"),
     path("bulk/<uuid:job_id>/rows/add/", views.BulkAddRowView.as_view(), name="bulk-add-row"), 
+    path("bulk/<uuid:job_id>/rows/batch/", views.BulkRowsBatchView.as_view(), name="bulk-rows-batch"),
 
     #List Inviations 
     path("list/", views.InvitationListView.as_view(), name="invitation-list"),
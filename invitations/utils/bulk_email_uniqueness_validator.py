@@ -14,3 +14,27 @@ def load_ticket_email_validation_context():
         for t in TicketType.objects.all()
     }
     return ticket_cache
+
+
+EXISTING_LOOKUP_CHUNK = 1000
+
+
+def load_existing_ticket_keys(emails, chunk_size=EXISTING_LOOKUP_CHUNK):
+    """
+    Returns the (email, ticket_name) pairs that already have an invitation,
+    restricted to `emails` and to ticket types enforcing unique emails.
+    Uses batched `IN` lookups on enforced_email (the lowercased email of invitations
+    whose ticket type enforces unique emails, backed by the
+    unique_enforced_email_per_ticket index) instead of scanning the whole table.
+    """
+    from invitations.models import Invitation
+
+    emails = sorted({(e or "").strip().lower() for e in emails} - {""})
+    existing_ticket = set()
+    for start in range(0, len(emails), chunk_size):
+        rows = Invitation.objects.filter(
+            enforced_email__in=emails[start:start + chunk_size],
+            ticket_type__enforce_unique_email=True,
+        ).values_list("enforced_email", "ticket_type__name")
+        existing_ticket.update((email.lower(), ticket.lower()) for email, ticket in rows)
+    return existing_ticket
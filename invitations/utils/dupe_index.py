@@ -0,0 +1,215 @@
+from invitations.utils.redis_utils import get_redis, get_rows, save_rows, RowConflictError, register_lua
+from invitations.utils.validate_row_csv import dupe_key, set_file_level_duplicate, FILE_DUPLICATE_MESSAGE
+
+# Per-job duplicate index: HASH bulk:job:{id}:dupes, field "email\x1fticket",
+# value = comma-separated ids of the rows sharing that pair, ascending. The lowest
+# id still stored is the row that keeps the pair; every other row is a file-level
+# duplicate of it, and its mark names the keeper's row_number (see file_mark).
+DUPE_KEY_SEP = "\x1f"
+
+# KEYS: dupes hash. ARGV: field, ids, field, ids, ...
+# Appends ids (already ascending, all larger than the stored ones) and returns,
+# per field, the first id stored before the append ('' when the field was new).
+APPEND_DUPE_IDS_SCRIPT = """
+local previous = {}
+for i = 1, #ARGV, 2 do
+    local current = redis.call('HGET', KEYS[1], ARGV[i])
+    if current then
+        redis.call('HSET', KEYS[1], ARGV[i], current .. ',' .. ARGV[i + 1])
+        previous[#previous + 1] = string.match(current, '^[^,]+')
+    else
+        redis.call('HSET', KEYS[1], ARGV[i], ARGV[i + 1])
+        previous[#previous + 1] = ''
+    end
+end
+return previous
+"""
+
+# KEYS: dupes hash. ARGV: row_id, old field ('' none), new field ('' none)
+# Moves one row id between two fields, keeping the new list ascending.
+MOVE_DUPE_ID_SCRIPT = """
+local row_id = tonumber(ARGV[1])
+local function read(field)
+    local ids = {}
+    local current = redis.call('HGET', KEYS[1], field)
+    if current then
+        for id in string.gmatch(current, '[^,]+') do
+            if tonumber(id) ~= row_id then ids[#ids + 1] = tonumber(id) end
+        end
+    end
+    return ids
+end
+local function write(field, ids)
+    if #ids == 0 then
+        redis.call('HDEL', KEYS[1], field)
+    else
+        redis.call('HSET', KEYS[1], field, table.concat(ids, ','))
+    end
+end
+if ARGV[2] ~= '' then
+    write(ARGV[2], read(ARGV[2]))
+end
+if ARGV[3] ~= '' then
+    local ids = read(ARGV[3])
+    ids[#ids + 1] = row_id
+    table.sort(ids)
+    write(ARGV[3], ids)
+end
+return 1
+"""
+
+
+def dupes_key(job_id):
+    return f"bulk:job:{job_id}:dupes"
+
+
+def dupe_field(key):
+    """Hash field for an (email, ticket) pair."""
+    return f"{key[0]}{DUPE_KEY_SEP}{key[1]}"
+
+
+def parse_dupe_field(field):
+    email, _, ticket = field.partition(DUPE_KEY_SEP)
+    return email, ticket
+
+
+def parse_dupe_ids(value):
+    return [int(row_id) for row_id in value.split(",")] if value else []
+
+
+def append_dupe_ids(hash_key, groups, client=None):
+    """
+    Append {field: [ids]} onto a duplicate index hash (queued when `client` is a pipeline).
+    Returns, per field, the first id stored before the append ('' for new fields).
+    """
+    if not groups:
+        return []
+    args = []
+    for field, ids in groups.items():
+        args += [field, ",".join(str(row_id) for row_id in ids)]
+    return register_lua("append_dupe_ids", APPEND_DUPE_IDS_SCRIPT)(keys=[hash_key], args=args, client=client)
+
+
+def group_dupe_ids(results, ticket_cache):
+    """{field: [ids]} of a validated batch, in row order."""
+    groups = {}
+    for row_obj in results:
+        key = dupe_key(row_obj, ticket_cache)
+        if key is not None:
+            groups.setdefault(dupe_field(key), []).append(row_obj["id"])
+    return groups
+
+
+def get_dupe_ids(job_id, key):
+    """Ids of the rows sharing an (email, ticket) pair, ascending."""
+    return parse_dupe_ids(get_redis().hget(dupes_key(job_id), dupe_field(key)))
+
+
+def move_dupe_id(job_id, row_id, old_key=None, new_key=None, client=None):
+    """
+    Atomically move a row between two (email, ticket) groups (None: no group).
+    The same key on both sides still (re)files the row: it may not have been listed
+    before, e.g. a row whose name error was just fixed.
+    """
+    if old_key is None and new_key is None:
+        return
+    register_lua("move_dupe_id", MOVE_DUPE_ID_SCRIPT)(
+        keys=[dupes_key(job_id)],
+        args=[
+            int(row_id),
+            dupe_field(old_key) if old_key else "",
+            dupe_field(new_key) if new_key else "",
+        ],
+        client=client,
+    )
+
+
+def move_dupe_ids(job_id, moves):
+    """Pipelined move_dupe_id for many (row_id, old_key, new_key) moves."""
+    pipe = get_redis().pipeline(transaction=False)
+    for row_id, old_key, new_key in moves:
+        move_dupe_id(job_id, row_id, old_key, new_key, client=pipe)
+    pipe.execute()
+
+
+def file_mark(keeper, row_obj):
+    """The file-level duplicate mark of `row_obj` in a group kept by `keeper`: its row_number, or None."""
+    return None if row_obj["id"] == keeper["id"] else keeper["row_number"]
+
+
+def expected_file_marks(job_id, entries):
+    """
+    The file-level duplicate mark each row will carry once filed under its new
+    (email, ticket) pair, for [(row_obj, new_key)] about to be written: rows of the
+    same batch leave their old groups, stored rows keep theirs.
+    Returns {row_id: mark} for the rows with a key.
+    """
+    keys = list({key for _, key in entries if key is not None})
+    if not keys:
+        return {}
+    moving = {row_obj["id"]: row_obj for row_obj, _ in entries}
+    id_lists = [parse_dupe_ids(v) for v in get_redis().hmget(dupes_key(job_id), [dupe_field(k) for k in keys])]
+    stored, _ = get_rows(job_id, [row_id for ids in id_lists for row_id in ids if row_id not in moving])
+    by_id = {row_obj["id"]: row_obj for row_obj in stored}
+
+    members = {key: [by_id[row_id] for row_id in ids if row_id in by_id] for key, ids in zip(keys, id_lists)}
+    for row_obj, key in entries:
+        if key is not None:
+            members[key].append(row_obj)
+    keepers = {key: min(rows, key=lambda row_obj: row_obj["id"]) for key, rows in members.items()}
+    return {
+        row_obj["id"]: file_mark(keepers[key], row_obj)
+        for row_obj, key in entries if key is not None
+    }
+
+
+def resolve_dupe_groups(job_id, keys, max_attempts=3):
+    """
+    Re-check the file-level duplicate mark of every row in the given (email, ticket)
+    groups: the lowest id keeps the pair, all others point at it. Only rows whose
+    mark changes are written, all in one pipelined compare-and-set pass; groups hit
+    by a concurrent edit are read again.
+    Returns ({row_id: row_obj} of rewritten rows, latest counters or None).
+    """
+    r = get_redis()
+    keys = list({key for key in keys if key is not None})
+    changed = {}
+    stats = None
+    for _ in range(max_attempts):
+        if not keys:
+            return changed, stats
+
+        id_lists = [parse_dupe_ids(v) for v in r.hmget(dupes_key(job_id), [dupe_field(k) for k in keys])]
+        rows, _ = get_rows(job_id, [row_id for ids in id_lists for row_id in ids])
+        by_id = {row_obj["id"]: row_obj for row_obj in rows}
+
+        writes, owners = [], []
+        for key, ids in zip(keys, id_lists):
+            group = [by_id[row_id] for row_id in ids if row_id in by_id]
+            for row_obj in group:
+                expected = file_mark(group[0], row_obj)
+                wanted = None if expected is None else FILE_DUPLICATE_MESSAGE.format(expected)
+                if row_obj["errors"].get("file_level_duplicate") == wanted:
+                    continue
+                old_row = {**row_obj, "errors": dict(row_obj["errors"])}
+                writes.append((set_file_level_duplicate(row_obj, expected), old_row))
+                owners.append(key)
+
+        applied, batch_stats = save_rows(job_id, writes)
+        stats = batch_stats or stats
+        for (row_obj, _), ok in zip(writes, applied):
+            if ok:
+                changed[row_obj["id"]] = row_obj
+        # Another request touched a row of these groups: read them again
+        keys = list({key for key, ok in zip(owners, applied) if not ok})
+
+    if keys:
+        raise RowConflictError("Rows were changed by another request.")
+    return changed, stats
+
+
+def row_pair(row_obj):
+    """The (email, ticket) pair a stored row is filed under, if any (eligible or not)."""
+    email = (row_obj.get("guest_email") or "").lower()
+    ticket = (row_obj.get("ticket_type") or "").lower()
+    return (email, ticket) if email and ticket else None
@@ -0,0 +1,274 @@
+import logging
+import time
+import uuid
+
+import orjson
+import xxhash
+from decouple import config
+
+from invitations.utils.redis_utils import get_redis, register_lua
+
+quota_logger = logging.getLogger("django")
+
+# HASH with the live global invitation counters: allocated, generated, reserved, registered
+# and credited (slots given back without un-generating, e.g. the unused part of a
+# soft-deleted invitation). remaining = allocated - generated - reserved + credited.
+# The InvitationStats row (id=1) is a periodic copy (reconcile_quota, every
+# QUOTA_RECONCILE_SECONDS), except `allocated`, which is edited in the DB.
+QUOTA_KEY = "quota:invitations"
+QUOTA_FIELDS = ("allocated", "generated", "reserved", "registered", "credited")
+
+# Named reservations: HASH {QUOTA_KEY}:reservations name -> held count and
+# ZSET {QUOTA_KEY}:reservations:expiry name -> expiry (epoch seconds). Expired
+# ones are swept back into the pool by every reservation call and the reconcile task.
+RESERVATION_TTL = config("QUOTA_RESERVATION_TTL", cast=int, default=60)
+
+# Per-process (expires_at, counters, etag) snapshot for read-heavy stats polling
+SNAPSHOT_TTL = config("QUOTA_SNAPSHOT_TTL", cast=float, default=2.0)
+_snapshot = (0.0, None, None)
+
+# Shared prologue of the reservation scripts.
+# KEYS: quota hash, reservations hash, reservations expiry zset. ARGV[1]: now
+RESERVATION_LUA = """
+if redis.call('EXISTS', KEYS[1]) == 0 then return {-1} end
+local now = tonumber(ARGV[1])
+for _, name in ipairs(redis.call('ZRANGEBYSCORE', KEYS[3], '-inf', now)) do
+    local held = tonumber(redis.call('HGET', KEYS[2], name) or 0)
+    if redis.call('HINCRBY', KEYS[1], 'reserved', -held) < 0 then redis.call('HSET', KEYS[1], 'reserved', 0) end
+    redis.call('HDEL', KEYS[2], name)
+    redis.call('ZREM', KEYS[3], name)
+end
+local function remaining()
+    local q = redis.call('HMGET', KEYS[1], 'allocated', 'generated', 'reserved', 'credited')
+    return tonumber(q[1] or 0) - tonumber(q[2] or 0) - tonumber(q[3] or 0) + tonumber(q[4] or 0)
+end
+"""
+
+# ARGV: now, name, count, expires_at
+# Holds `count` invitations under `name` (re-reserving a name replaces its count).
+# Returns {1, remaining} or {0, remaining} (nothing changed); {-1} when not loaded.
+RESERVE_SCRIPT = RESERVATION_LUA + """
+local name, count = ARGV[2], tonumber(ARGV[3])
+local held = tonumber(redis.call('HGET', KEYS[2], name) or 0)
+local available = remaining() + held
+if available < count then return {0, available} end
+redis.call('HINCRBY', KEYS[1], 'reserved', count - held)
+redis.call('HSET', KEYS[2], name, count)
+redis.call('ZADD', KEYS[3], ARGV[4], name)
+return {1, available - count}
+"""
+
+# ARGV: now, name, used, expires_at ('' closes the reservation)
+# Counts `used` invitations as generated, drawing on the reservation first (an expired
+# one is gone: the work is done, so it is counted anyway). With an expires_at the rest
+# stays held until then, otherwise it is released.
+COMMIT_SCRIPT = RESERVATION_LUA + """
+local name, used = ARGV[2], tonumber(ARGV[3])
+local held = tonumber(redis.call('HGET', KEYS[2], name) or 0)
+local take = math.min(used, held)
+redis.call('HINCRBY', KEYS[1], 'reserved', -take)
+redis.call('HINCRBY', KEYS[1], 'generated', used)
+if ARGV[4] ~= '' and held > take then
+    redis.call('HSET', KEYS[2], name, held - take)
+    redis.call('ZADD', KEYS[3], ARGV[4], name)
+else
+    redis.call('HINCRBY', KEYS[1], 'reserved', take - held)
+    redis.call('HDEL', KEYS[2], name)
+    redis.call('ZREM', KEYS[3], name)
+end
+return {1, remaining()}
+"""
+
+# ARGV: now, name ('' only sweeps expired reservations)
+RELEASE_SCRIPT = RESERVATION_LUA + """
+local held = tonumber(redis.call('HGET', KEYS[2], ARGV[2]) or 0)
+if held > 0 then
+    redis.call('HINCRBY', KEYS[1], 'reserved', -held)
+end
+redis.call('HDEL', KEYS[2], ARGV[2])
+redis.call('ZREM', KEYS[3], ARGV[2])
+return {1, remaining()}
+"""
+
+# KEYS: quota hash. ARGV: field, delta, field, delta, ...
+# Applies the deltas (counters never go below 0) and returns the remaining count;
+# {-1} when the counters are not loaded.
+ADJUST_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then return {-1} end
+for i = 1, #ARGV, 2 do
+    local value = redis.call('HINCRBY', KEYS[1], ARGV[i], ARGV[i + 1])
+    if value < 0 then redis.call('HSET', KEYS[1], ARGV[i], 0) end
+end
+local q = redis.call('HMGET', KEYS[1], 'allocated', 'generated', 'reserved', 'credited')
+return {1, tonumber(q[1] or 0) - tonumber(q[2] or 0) - tonumber(q[3] or 0) + tonumber(q[4] or 0)}
+"""
+
+
+def load_quota(r=None, key=QUOTA_KEY):
+    """Seed the Redis counters from the InvitationStats row (no-op for fields already there)."""
+    from invitations.models import InvitationStats
+
+    r = r or get_redis()
+    stats, _ = InvitationStats.objects.get_or_create(id=1)
+    pipe = r.pipeline(transaction=True)
+    pipe.hsetnx(key, "allocated", stats.allocated_invitations)
+    pipe.hsetnx(key, "generated", stats.generated_invitations)
+    pipe.hsetnx(key, "reserved", 0)
+    pipe.hsetnx(key, "registered", stats.registered_visitors)
+    pipe.hsetnx(key, "credited", max(
+        stats.remaining_invitations - (stats.allocated_invitations - stats.generated_invitations), 0
+    ))
+    pipe.execute()
+
+
+def _run(name, source, args, keys=None, key=QUOTA_KEY):
+    invalidate_quota_snapshot()
+    r = get_redis()
+    script = register_lua(name, source)
+    keys = keys or [key]
+    result = script(keys=keys, args=args)
+    if result[0] == -1:
+        load_quota(r, key)
+        result = script(keys=keys, args=args)
+    return result
+
+
+def _run_reservation(name, source, *args, key=QUOTA_KEY):
+    keys = [key, f"{key}:reservations", f"{key}:reservations:expiry"]
+    return _run(name, source, [time.time(), *args], keys=keys, key=key)
+
+
+def _adjust(**deltas):
+    args = []
+    for field, delta in deltas.items():
+        if delta:
+            args += [field, int(delta)]
+    if not args:
+        return get_quota()["remaining_invitations"]
+    return _run("quota_adjust", ADJUST_SCRIPT, args)[1]
+
+
+def reserve_quota(count, name=None, ttl=None, key=QUOTA_KEY):
+    """
+    Atomically hold `count` invitations under a reservation `name` (a fresh one when
+    None) for `ttl` seconds; re-reserving a name replaces its count. `key` is the
+    counters hash (another one only for scratch runs, e.g. bench_quota).
+    Returns (ok, remaining, name); nothing is held when ok is False.
+    Follow with commit_quota or release_quota; an abandoned reservation expires.
+    """
+    name = name or f"anon:{uuid.uuid4()}"
+    expires_at = time.time() + (ttl or RESERVATION_TTL)
+    ok, remaining = _run_reservation("quota_reserve", RESERVE_SCRIPT, name, int(count), expires_at, key=key)
+    return bool(ok), remaining, name
+
+
+def commit_quota(name, used, keep_ttl=None, key=QUOTA_KEY):
+    """
+    Count `used` generated invitations against reservation `name`. The rest of the
+    reservation is released, or with `keep_ttl` kept (and extended) for later commits.
+    Returns the remaining count.
+    """
+    expires_at = "" if keep_ttl is None else time.time() + keep_ttl
+    return _run_reservation("quota_commit", COMMIT_SCRIPT, name, int(used), expires_at, key=key)[1]
+
+
+def release_quota(name, key=QUOTA_KEY):
+    """Give back whatever reservation `name` still holds."""
+    return _run_reservation("quota_release", RELEASE_SCRIPT, name, key=key)[1]
+
+
+def expire_reservations():
+    """Return expired reservations to the pool."""
+    return _run_reservation("quota_release", RELEASE_SCRIPT, "")[1]
+
+
+def add_generated(count):
+    """Count invitations generated without a reservation."""
+    return _adjust(generated=count)
+
+
+def return_generated(count):
+    """Give back generated invitations (e.g. a deleted, unused invitation)."""
+    return _adjust(generated=-count)
+
+
+def credit_remaining(count):
+    """Raise the remaining count without un-generating (e.g. a soft-deleted invitation's unused slots)."""
+    return _adjust(credited=count)
+
+
+def add_registered(count=1):
+    return _adjust(registered=count)
+
+
+def get_quota():
+    """The live counters, under InvitationStats field names."""
+    r = get_redis()
+    values = r.hmget(QUOTA_KEY, QUOTA_FIELDS)
+    if values[0] is None:
+        load_quota(r)
+        values = r.hmget(QUOTA_KEY, QUOTA_FIELDS)
+    allocated, generated, reserved, registered, credited = (int(v or 0) for v in values)
+    return {
+        "allocated_invitations": allocated,
+        "generated_invitations": generated,
+        "remaining_invitations": max(allocated - generated - reserved + credited, 0),
+        "registered_visitors": registered,
+    }
+
+
+def quota_etag(quota):
+    return f'"{xxhash.xxh64_hexdigest(orjson.dumps(quota, option=orjson.OPT_SORT_KEYS))}"'
+
+
+def quota_snapshot():
+    """
+    (counters, etag) from a per-process snapshot, re-read from Redis at most every
+    QUOTA_SNAPSHOT_TTL seconds. Writes in this process drop it right away.
+    """
+    global _snapshot
+    expires_at, quota, etag = _snapshot
+    now = time.monotonic()
+    if quota is None or now >= expires_at:
+        quota = get_quota()
+        etag = quota_etag(quota)
+        _snapshot = (now + SNAPSHOT_TTL, quota, etag)
+    return quota, etag
+
+
+def invalidate_quota_snapshot():
+    global _snapshot
+    _snapshot = (0.0, None, None)
+
+
+def quota_stats(quota=None):
+    """Unsaved InvitationStats carrying the counters (for InvitationStatsSerializer)."""
+    from invitations.models import InvitationStats
+
+    return InvitationStats(id=1, **(quota or get_quota()))
+
+
+def reconcile_quota():
+    """
+    Sync the Redis counters with the InvitationStats row: `allocated` flows from
+    the DB (admin edits) to Redis, the usage counters from Redis to the DB.
+    Expired reservations are swept first.
+    """
+    from invitations.models import InvitationStats
+
+    r = get_redis()
+    stats, _ = InvitationStats.objects.get_or_create(id=1)
+    if not r.exists(QUOTA_KEY):
+        load_quota(r)
+    r.hset(QUOTA_KEY, "allocated", stats.allocated_invitations)
+    expire_reservations()
+    invalidate_quota_snapshot()
+
+    quota = get_quota()
+    InvitationStats.objects.filter(id=1).update(
+        generated_invitations=quota["generated_invitations"],
+        remaining_invitations=quota["remaining_invitations"],
+        registered_visitors=quota["registered_visitors"],
+    )
+    quota_logger.debug(f"Quota reconciled: {quota}")
+    return quota
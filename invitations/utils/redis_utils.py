@@ -1,8 +1,18 @@
+import uuid
+
 import orjson
+from decouple import config
 from django.conf import settings
 import redis
 
+from invitations.utils.row_codec import encode_row, decode_row
+
 REDIS_URL = getattr(settings, "REDIS_URL", "redis://127.0.0.1:6379/0")
+# Lifetime of a job's lazily built trigram search index (see ensure_search_index)
+SEARCH_INDEX_TTL = config("BULK_SEARCH_INDEX_TTL", cast=int, default=900)
+SEARCH_INDEX_BUILD_TTL = 300
+# gram sets outlive the ready marker a little, so a live index never misses a set
+SEARCH_INDEX_TTL_MARGIN = 60
 _redis = None
 
 def get_redis():
@@ -11,40 +21,480 @@ def get_redis():
         _redis = redis.from_url(REDIS_URL, decode_responses=True)
     return _redis
 
+
+class RowConflictError(Exception):
+    """The stored row changed (or appeared) after it was read."""
+
+
+# KEYS: rows, stats, idx:keys, idx:grams, idx:grams:keys, <index keys to add>...,
+#       <index keys to remove>..., <gram keys to add>..., <gram keys to remove>...
+# ARGV: row_id, payload ('' deletes), 'absent'|'equals', expected payload (codec),
+#       expected payload (legacy orjson), d_total, d_valid, d_invalid, n_add, n_rem,
+#       n_gram_add, n_gram_rem, gram key ttl margin (ms), <added names>...
+# Gram sets are only touched while the job's search index exists (see ensure_search_index).
+WRITE_ROW_SCRIPT = """
+local current = redis.call('HGET', KEYS[1], ARGV[1])
+if ARGV[3] == 'absent' then
+    if current then return {0} end
+elseif current ~= ARGV[4] and current ~= ARGV[5] then
+    return {0}
+end
+
+if ARGV[2] == '' then
+    redis.call('HDEL', KEYS[1], ARGV[1])
+else
+    redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+end
+
+local n_add = tonumber(ARGV[9])
+local n_rem = tonumber(ARGV[10])
+for i = 1, n_add do
+    redis.call('ZADD', KEYS[5 + i], ARGV[1], ARGV[1])
+end
+for i = 1, n_rem do
+    redis.call('ZREM', KEYS[5 + n_add + i], ARGV[1])
+end
+if n_add > 1 then
+    redis.call('SADD', KEYS[3], unpack(ARGV, 14, 12 + n_add))
+end
+
+local n_gram_add = tonumber(ARGV[11])
+local n_gram_rem = tonumber(ARGV[12])
+local gram_base = 5 + n_add + n_rem
+if redis.call('EXISTS', KEYS[4]) == 1 then
+    local ttl = redis.call('PTTL', KEYS[4]) + tonumber(ARGV[13])
+    for i = 1, n_gram_add do
+        redis.call('ZADD', KEYS[gram_base + i], ARGV[1], ARGV[1])
+        redis.call('PEXPIRE', KEYS[gram_base + i], ttl)
+    end
+    for i = 1, n_gram_rem do
+        redis.call('ZREM', KEYS[gram_base + n_gram_add + i], ARGV[1])
+    end
+    if n_gram_add > 0 then
+        redis.call('SADD', KEYS[5], unpack(KEYS, gram_base + 1, gram_base + n_gram_add))
+        redis.call('PEXPIRE', KEYS[5], ttl)
+    end
+end
+
+local fields = {'total_count', 'valid_count', 'invalid_count'}
+for i, field in ipairs(fields) do
+    local delta = tonumber(ARGV[5 + i])
+    if delta ~= 0 then
+        redis.call('HINCRBY', KEYS[2], field, delta)
+    end
+end
+local stats = redis.call('HMGET', KEYS[2], unpack(fields))
+return {1, stats[1], stats[2], stats[3]}
+"""
+_scripts = {}
+
+def register_lua(name, source):
+    """Register a Lua script once per process (EVALSHA with EVAL fallback)."""
+    if name not in _scripts:
+        _scripts[name] = get_redis().register_script(source)
+    return _scripts[name]
+
+def index_key(job_id, name):
+    """Key of one of a job's row index sorted sets (member and score are the row id)."""
+    return f"bulk:job:{job_id}:idx:{name}"
+
+def _index_name(status=None, ticket_type=None):
+    """Index set holding the rows of a status and/or ticket type ("all" when unfiltered)."""
+    parts = []
+    if ticket_type is not None:
+        parts.append(f"ticket:{ticket_type.lower()}")
+    if status is not None:
+        parts.append(f"status:{status.lower()}")
+    return ":".join(parts) or "all"
+
+def _search_grams(text):
+    """Trigrams of a lowercased search field (fields shorter than 3 chars have none)."""
+    text = (text or "").lower()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+def _row_index_names(row_obj):
+    status = row_obj.get("status") or ""
+    ticket = row_obj.get("ticket_type") or ""
+    return {_index_name(status=status), _index_name(ticket_type=ticket), _index_name(status, ticket)}
+
+def _row_gram_names(row_obj):
+    grams = _search_grams(row_obj.get("guest_name")) | _search_grams(row_obj.get("guest_email"))
+    return {f"gram:{gram}" for gram in grams}
+
+def index_row(pipe, job_id, row_obj, old_row=None):
+    """
+    Queue the index updates for a stored row on `pipe`.
+    - idx:all holds every row id; idx:status:<s>, idx:ticket:<t> and
+      idx:ticket:<t>:status:<s> the matching ones, so any filter is a single set
+    - idx:keys registers the dynamic names so they can be copied/deleted
+    Pass `old_row` when the row replaces a previous version of itself.
+    """
+    row_id = int(row_obj["id"])
+    names = _row_index_names(row_obj)
+    if old_row is not None:
+        for name in _row_index_names(old_row) - names:
+            pipe.zrem(index_key(job_id, name), row_id)
+    pipe.zadd(index_key(job_id, "all"), {row_id: row_id})
+    for name in names:
+        pipe.zadd(index_key(job_id, name), {row_id: row_id})
+    pipe.sadd(index_key(job_id, "keys"), *names)
+
+def unindex_row(pipe, job_id, row_obj):
+    """Queue removal of a row from the job's index sets on `pipe`."""
+    row_id = int(row_obj["id"])
+    for name in _row_index_names(row_obj):
+        pipe.zrem(index_key(job_id, name), row_id)
+    pipe.zrem(index_key(job_id, "all"), row_id)
+
+def ensure_row_index(job_id, batch_size=1000):
+    """Build the row index for jobs whose rows were stored before it existed."""
+    r = get_redis()
+    if r.exists(index_key(job_id, "all")) or not r.exists(f"bulk:job:{job_id}:rows"):
+        return
+    pipe = r.pipeline(transaction=False)
+    for n, (_, raw) in enumerate(r.hscan_iter(f"bulk:job:{job_id}:rows", count=batch_size), start=1):
+        index_row(pipe, job_id, decode_row(raw))
+        if n % batch_size == 0:
+            pipe.execute()
+    pipe.execute()
+
 def push_row(job_id, row_obj):
     """Store a row in Redis Hash with id as key."""
     r = get_redis()
     key = f"bulk:job:{job_id}:rows"
     row_id = row_obj["id"]
-    r.hset(key, row_id, orjson.dumps(row_obj))
+    pipe = r.pipeline()
+    pipe.hset(key, row_id, encode_row(row_obj))
+    index_row(pipe, job_id, row_obj)
+    pipe.delete(search_index_key(job_id))  # rebuilt on the next search
+    pipe.execute()
 
-def range_rows(job_id, id_list=None):
-    """Fetch specific rows by id or all rows."""
+def get_rows(job_id, ids, chunk_size=1000):
+    """
+    Fetch rows by id in one HMGET (pipelined HMGET chunks for large lists).
+    Returns (rows, missing_ids), rows in the order of `ids`.
+    """
     r = get_redis()
     key = f"bulk:job:{job_id}:rows"
+    ids = list(ids)
+    pipe = r.pipeline(transaction=False)
+    for start in range(0, len(ids), chunk_size):
+        pipe.hmget(key, [str(row_id) for row_id in ids[start:start + chunk_size]])
+    raws = [raw for chunk in pipe.execute() for raw in chunk]
+
+    rows, missing = [], []
+    for row_id, raw in zip(ids, raws):
+        if raw is None:
+            missing.append(row_id)
+        else:
+            rows.append(decode_row(raw))
+    return rows, missing
+
+def last_row(job_id):
+    """The row with the highest id (None for an empty job)."""
+    ensure_row_index(job_id)
+    ids = get_redis().zrange(index_key(job_id, "all"), -1, -1)
+    rows, _ = get_rows(job_id, ids)
+    return rows[0] if rows else None
+
+def iter_row_batches(job_id, batch_size=1000, status=None, ticket_type=None, start_id=None, stop_id=None):
+    """
+    Stream a job's rows in id order, `batch_size` rows per list, through the index sets.
+    Windows continue after the last id seen, so rows deleted mid-iteration don't shift the rest.
+    `start_id`/`stop_id` limit the stream to ids in [start_id, stop_id).
+    """
+    r = get_redis()
+    ensure_row_index(job_id)
+    key = index_key(job_id, _index_name(status, ticket_type))
+    high = "+inf" if stop_id is None else f"({stop_id}"
+    last_id = None
+    while True:
+        if last_id is not None:
+            low = f"({last_id}"
+        else:
+            low = "-inf" if start_id is None else start_id
+        ids = r.zrangebyscore(key, low, high, start=0, num=batch_size)
+        if not ids:
+            return
+        rows, _ = get_rows(job_id, ids, chunk_size=batch_size)
+        if rows:
+            yield rows
+        last_id = ids[-1]
+
+def split_row_ids(job_id, chunk_size, status=None, ticket_type=None):
+    """
+    Cut a job's (filtered) rows into consecutive id ranges of `chunk_size` rows.
+    Returns [(start_id, stop_id), ...] for iter_row_batches; the last stop_id is None.
+    """
+    r = get_redis()
+    ensure_row_index(job_id)
+    key = index_key(job_id, _index_name(status, ticket_type))
+    pipe = r.pipeline(transaction=False)
+    for rank in range(0, r.zcard(key), chunk_size):
+        pipe.zrange(key, rank, rank)
+    starts = [int(ids[0]) for ids in pipe.execute() if ids]
+    return list(zip(starts, starts[1:] + [None]))
+
+def iter_rows(job_id, batch_size=1000, status=None, ticket_type=None):
+    """Stream a job's rows one by one in id order (see iter_row_batches)."""
+    for rows in iter_row_batches(job_id, batch_size, status, ticket_type):
+        yield from rows
+
+def range_rows(job_id, id_list=None):
+    """Fetch specific rows by id or all rows."""
     if id_list:
-        rows = [orjson.loads(r.hget(key, str(id))) for id in id_list if r.hexists(key, str(id))]
+        rows, _ = get_rows(job_id, id_list)
+        return sorted(rows, key=lambda r: r["id"])  # Sort by id for consistency
+    return list(iter_rows(job_id))
+
+def page_rows(job_id, offset, limit, status=None, ticket_type=None):
+    """Fetch one page of rows in id order, filtered through the index sets (limit=None: to the end)."""
+    r = get_redis()
+    stop = -1 if limit is None else offset + limit - 1
+    ids = r.zrange(index_key(job_id, _index_name(status, ticket_type)), offset, stop)
+    if not ids:
+        return []
+    raws = r.hmget(f"bulk:job:{job_id}:rows", ids)
+    return [decode_row(raw) for raw in raws if raw is not None]
+
+def search_index_key(job_id):
+    """"building" | "ready" while the job's trigram search index exists (expires after SEARCH_INDEX_TTL)."""
+    return index_key(job_id, "grams")
+
+def ensure_search_index(job_id, batch_size=1000):
+    """
+    Build the job's trigram index on first search: idx:gram:<abc> holds the rows whose
+    guest_name/guest_email contain that trigram, idx:grams:keys lists those sets.
+    Jobs that are never searched never pay for it. Everything expires after
+    SEARCH_INDEX_TTL; row writes keep the sets current while they exist (WRITE_ROW_SCRIPT).
+    Returns True once the index is ready; False while another request builds it.
+    """
+    r = get_redis()
+    marker = search_index_key(job_id)
+    state = r.get(marker)
+    if state == "ready":
+        return True
+    if state is not None or not r.set(marker, "building", nx=True, ex=SEARCH_INDEX_BUILD_TTL):
+        return False
+
+    # The marker is set before the scan, so edits made meanwhile land in the sets too
+    # (a row read before its edit can only leave false positives, which search drops)
+    pipe = r.pipeline(transaction=False)
+    gram_keys = set()
+    for n, (_, raw) in enumerate(r.hscan_iter(f"bulk:job:{job_id}:rows", count=batch_size), start=1):
+        row_obj = decode_row(raw)
+        row_id = int(row_obj["id"])
+        for name in _row_gram_names(row_obj):
+            key = index_key(job_id, name)
+            pipe.zadd(key, {row_id: row_id})
+            gram_keys.add(key)
+        if n % batch_size == 0:
+            pipe.execute()
+    pipe.execute()
+
+    registry = index_key(job_id, "grams:keys")
+    keys = sorted(gram_keys)
+    for start in range(0, len(keys), batch_size):
+        pipe.sadd(registry, *keys[start:start + batch_size])
+    pipe.execute()
+    ttl = SEARCH_INDEX_TTL + SEARCH_INDEX_TTL_MARGIN
+    for key in r.sscan_iter(registry, count=batch_size):
+        pipe.expire(key, ttl)
+    pipe.expire(registry, ttl)
+    pipe.set(marker, "ready", ex=SEARCH_INDEX_TTL)
+    pipe.execute()
+    return True
+
+def search_rows(job_id, query, status=None, ticket_type=None, batch_size=1000):
+    """
+    Rows whose guest_name or guest_email contains `query`, in id order.
+    Candidates come from intersecting the query's trigram sets with the filter set;
+    only those candidates are decoded to drop trigram false positives. While the
+    trigram index is being built (or for 1-2 character queries) the filter set is scanned.
+    """
+    r = get_redis()
+    query = query.lower()
+    base = index_key(job_id, _index_name(status, ticket_type))
+    grams = _search_grams(query)
+    if grams and ensure_search_index(job_id, batch_size):
+        dest = index_key(job_id, f"tmp:search:{uuid.uuid4().hex}")
+        pipe = r.pipeline()
+        pipe.zinterstore(dest, [base, *(index_key(job_id, f"gram:{gram}") for gram in grams)], aggregate="MIN")
+        pipe.zrange(dest, 0, -1)
+        pipe.delete(dest)
+        ids = pipe.execute()[1]
     else:
-        rows = [orjson.loads(v) for v in r.hgetall(key).values()]
-    return sorted(rows, key=lambda r: r["id"])  # Sort by id for consistency
+        ids = r.zrange(base, 0, -1)
+
+    matches = []
+    for start in range(0, len(ids), batch_size):
+        for raw in r.hmget(f"bulk:job:{job_id}:rows", ids[start:start + batch_size]):
+            if raw is None:
+                continue
+            row = decode_row(raw)
+            if query in (row.get("guest_name") or "").lower() or query in (row.get("guest_email") or "").lower():
+                matches.append(row)
+    return matches
+
+def count_rows(job_id, status=None, ticket_type=None):
+    """total/valid/invalid counts for a filter, from index cardinalities only."""
+    r = get_redis()
+    pipe = r.pipeline(transaction=False)
+    pipe.zcard(index_key(job_id, _index_name(status, ticket_type)))
+    for row_status in ("valid", "invalid"):
+        pipe.zcard(index_key(job_id, _index_name(row_status, ticket_type)))
+    total, valid, invalid = pipe.execute()
+    if status:
+        valid = valid if status.lower() == "valid" else 0
+        invalid = invalid if status.lower() == "invalid" else 0
+    return {"total_count": total, "valid_count": valid, "invalid_count": invalid}
 
-def update_row(job_id, row_id, row_obj):
-    """Update a row in Redis Hash by id."""
-    print(f"UPDATING ROW IN REDIS: id={row_id}, data={row_obj}")
+def update_row(job_id, row_id, row_obj, old_row=None):
+    """Update a row in Redis Hash by id. Pass the already fetched `old_row` to save a round trip."""
     r = get_redis()
     key = f"bulk:job:{job_id}:rows"
-    r.hset(key, row_id, orjson.dumps(row_obj))
+    if old_row is None:
+        old = r.hget(key, row_id)
+        old_row = decode_row(old) if old else None
+    pipe = r.pipeline()
+    pipe.hset(key, row_id, encode_row(row_obj))
+    index_row(pipe, job_id, row_obj, old_row=old_row)
+    pipe.delete(search_index_key(job_id))  # rebuilt on the next search
+    pipe.execute()
 
-def delete_row(job_id, row_id):
-    """Delete a row from Redis Hash by id."""
+def delete_row(job_id, row_id, old_row=None):
+    """Delete a row from Redis Hash by id. Pass the already fetched `old_row` to save a round trip."""
     r = get_redis()
     key = f"bulk:job:{job_id}:rows"
-    r.hdel(key, str(row_id))
+    if old_row is None:
+        old = r.hget(key, str(row_id))
+        old_row = decode_row(old) if old else None
+    pipe = r.pipeline()
+    pipe.hdel(key, str(row_id))
+    if old_row:
+        unindex_row(pipe, job_id, old_row)
+    pipe.delete(search_index_key(job_id))  # rebuilt on the next search
+    pipe.execute()
 
 def delete_rows_key(job_id):
-    """Delete entire rows Hash."""
+    """Delete entire rows Hash along with its index, duplicate map, validation checkpoint and send ledger."""
     r = get_redis()
-    r.delete(f"bulk:job:{job_id}:rows")
+    names = r.smembers(index_key(job_id, "keys"))
+    gram_keys = r.smembers(index_key(job_id, "grams:keys"))
+    r.delete(
+        f"bulk:job:{job_id}:rows",
+        f"bulk:job:{job_id}:dupes",
+        f"bulk:job:{job_id}:checkpoint",
+        f"bulk:job:{job_id}:send",
+        f"bulk:job:{job_id}:send:sent",
+        f"bulk:job:{job_id}:send:chunks",
+        index_key(job_id, "all"),
+        index_key(job_id, "keys"),
+        search_index_key(job_id),
+        index_key(job_id, "grams:keys"),
+        *(index_key(job_id, name) for name in names),
+        *gram_keys,
+    )
+
+def _status_counts(row_obj):
+    if row_obj is None:
+        return 0, 0, 0
+    status = row_obj.get("status")
+    return 1, int(status == "valid"), int(status == "invalid")
+
+def _queue_write_row(client, job_id, row_id, row_obj, old_row):
+    """
+    Call WRITE_ROW_SCRIPT on `client` (a pipeline queues it): replace/insert/delete one
+    row, its index entries and the total/valid/invalid counters in a single atomic call.
+    The write only happens if the stored row still equals `old_row` (or is absent
+    when `old_row` is None).
+    """
+    new_names = _row_index_names(row_obj) | {"all"} if row_obj else set()
+    old_names = _row_index_names(old_row) | {"all"} if old_row else set()
+    add_names = sorted(new_names)
+    rem_names = sorted(old_names - new_names)
+    new_grams = _row_gram_names(row_obj) if row_obj else set()
+    old_grams = _row_gram_names(old_row) if old_row else set()
+    gram_add = sorted(new_grams)
+    gram_rem = sorted(old_grams - new_grams)
+
+    new_counts = _status_counts(row_obj)
+    old_counts = _status_counts(old_row)
+    deltas = [new - old for new, old in zip(new_counts, old_counts)]
+
+    keys = [
+        f"bulk:job:{job_id}:rows",
+        f"bulk:job:{job_id}:stats",
+        index_key(job_id, "keys"),
+        search_index_key(job_id),
+        index_key(job_id, "grams:keys"),
+        *(index_key(job_id, name) for name in add_names),
+        *(index_key(job_id, name) for name in rem_names),
+        *(index_key(job_id, name) for name in gram_add),
+        *(index_key(job_id, name) for name in gram_rem),
+    ]
+    args = [
+        int(row_id),
+        encode_row(row_obj) if row_obj else "",
+        "equals" if old_row else "absent",
+        encode_row(old_row) if old_row else "",
+        orjson.dumps(old_row) if old_row else "",
+        *deltas,
+        len(add_names),
+        len(rem_names),
+        len(gram_add),
+        len(gram_rem),
+        SEARCH_INDEX_TTL_MARGIN * 1000,
+        *(name for name in add_names if name != "all"),
+    ]
+    return register_lua("write_row", WRITE_ROW_SCRIPT)(keys=keys, args=args, client=client)
+
+def _write_result_stats(result):
+    return {
+        "total_count": int(result[1] or 0),
+        "valid_count": int(result[2] or 0),
+        "invalid_count": int(result[3] or 0),
+    }
+
+def _write_row(job_id, row_id, row_obj, old_row):
+    """Single WRITE_ROW_SCRIPT call. Returns the updated counters, raises RowConflictError."""
+    result = _queue_write_row(get_redis(), job_id, row_id, row_obj, old_row)
+    if not result[0]:
+        raise RowConflictError(f"Row {row_id} was changed by another request.")
+    return _write_result_stats(result)
+
+def save_rows(job_id, changes):
+    """
+    Apply many (row_obj, old_row) changes in one pipelined round trip, each one atomic
+    and compare-and-set like save_row (row_obj None deletes, old_row None inserts).
+    Returns ([applied?] per change, counters after the last applied change or None).
+    """
+    if not changes:
+        return [], None
+    pipe = get_redis().pipeline(transaction=False)
+    for row_obj, old_row in changes:
+        row_id = (row_obj or old_row)["id"]
+        _queue_write_row(pipe, job_id, row_id, row_obj, old_row)
+    results = pipe.execute()
+
+    applied = [bool(result[0]) for result in results]
+    stats = None
+    for result in reversed(results):
+        if result[0]:
+            stats = _write_result_stats(result)
+            break
+    return applied, stats
+
+def save_row(job_id, row_obj, old_row=None):
+    """
+    Atomically store `row_obj` over `old_row` (None: the id must be free) and
+    adjust the job counters. Returns the updated counters.
+    """
+    return _write_row(job_id, row_obj["id"], row_obj, old_row)
+
+def remove_row(job_id, old_row):
+    """Atomically delete `old_row` (if unchanged) and adjust the job counters."""
+    return _write_row(job_id, old_row["id"], None, old_row)
 
 def set_stats(job_id, **kwargs):
     """Set job stats."""
@@ -84,6 +534,88 @@ def get_status(job_id):
     r = get_redis()
     return r.get(f"bulk:job:{job_id}:status")
 
+def get_checkpoint(job_id):
+    """Get the validation checkpoint of a job (empty dict when none)."""
+    r = get_redis()
+    data = r.hgetall(f"bulk:job:{job_id}:checkpoint")
+    return {k: int(v) if str(v).isdigit() else v for k, v in data.items()}
+
+def set_send_params(job_id, **params):
+    """Remember the parameters a job's send was started with (used to resume it)."""
+    get_redis().set(f"bulk:job:{job_id}:send", orjson.dumps(params))
+
+def get_send_params(job_id):
+    """Parameters of a started send, or None when the job was never sent."""
+    raw = get_redis().get(f"bulk:job:{job_id}:send")
+    return orjson.loads(raw) if raw else None
+
+def mark_rows_sent(job_id, row_ids):
+    """Record row ids whose invitations (or duplicate records) are committed to the DB."""
+    if row_ids:
+        get_redis().sadd(f"bulk:job:{job_id}:send:sent", *row_ids)
+
+def unsent_row_ids(job_id, row_ids):
+    """The subset of `row_ids` not yet in the job's send ledger, in the given order."""
+    if not row_ids:
+        return []
+    sent = get_redis().smismember(f"bulk:job:{job_id}:send:sent", row_ids)
+    return [row_id for row_id, done in zip(row_ids, sent) if not done]
+
+def sent_row_count(job_id):
+    return get_redis().scard(f"bulk:job:{job_id}:send:sent")
+
+def copy_job_keys(src_job_id, dst_job_id, suffixes=("rows", "dupes", "stats"), ttl=None):
+    """
+    Server-side copy of a job's Redis keys (COPY ... REPLACE, Redis >= 6.2) to another
+    job id. Copying "rows" brings the row index sets along. Older servers without COPY
+    fall back to DUMP/RESTORE, which moves each payload through this client.
+    """
+    r = get_redis()
+    suffixes = list(suffixes)
+    if "rows" in suffixes:
+        names = ["all", "keys", *r.smembers(index_key(src_job_id, "keys"))]
+        suffixes += [f"idx:{name}" for name in names]
+    pairs = [(f"bulk:job:{src_job_id}:{suffix}", f"bulk:job:{dst_job_id}:{suffix}") for suffix in suffixes]
+    pipe = r.pipeline(transaction=False)
+    for src, dst in pairs:
+        pipe.copy(src, dst, replace=True)
+        if ttl:
+            pipe.expire(dst, ttl)
+    try:
+        pipe.execute()
+    except redis.exceptions.ResponseError as e:
+        if "unknown command" not in str(e).lower():
+            raise
+        _dump_restore_keys(r, pairs, ttl)
+
+def _dump_restore_keys(r, pairs, ttl=None):
+    pipe = r.pipeline(transaction=False)
+    for src, _ in pairs:
+        pipe.dump(src)
+    payloads = pipe.execute()
+    for (_, dst), payload in zip(pairs, payloads):
+        if payload is None:
+            continue
+        pipe.restore(dst, (ttl or 0) * 1000, payload, replace=True)
+    pipe.execute()
+
+def get_version(name):
+    """Get a monotonically increasing version counter (0 when never bumped)."""
+    r = get_redis()
+    return int(r.get(f"version:{name}") or 0)
+
+def get_versions(names):
+    """get_version for many counters in one MGET."""
+    names = list(names)
+    if not names:
+        return []
+    return [int(v or 0) for v in get_redis().mget([f"version:{name}" for name in names])]
+
+def bump_version(name):
+    """Increment a version counter, invalidating anything keyed on the old value."""
+    r = get_redis()
+    return r.incr(f"version:{name}")
+
 def set_export_progress(job_id, processed, total):
     """Set export progress."""
     r = get_redis()
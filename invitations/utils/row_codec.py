@@ -0,0 +1,135 @@
+import base64
+import re
+import zlib
+
+import orjson
+
+# v1 layout:
+# [1, id, row_number, guest_name, guest_email, ticket_type, company,
+#  personal_message, status, flags, errors, (extra)]
+CODEC_VERSION = 1
+
+STATUSES = ("valid", "invalid")
+FLAG_ERROR_FOUND = 1
+FLAG_DUPLICATE = 2
+FLAG_FILE_LEVEL_DUPLICATE = 4
+
+ERROR_FIELDS = ("guest_name", "guest_email", "ticket_type", "duplicate", "file_level_duplicate")
+ERROR_MESSAGES = {
+    "guest_name": "Full Name is required (min 2 chars, letters only).",
+    "guest_email": "Invalid email format.",
+    "ticket_type": "Select valid ticket.",
+    "duplicate": "Duplicate invitation for this email and ticket type.",
+}
+# Shared with validate_row_csv, which writes the message this codec compacts
+FILE_DUPLICATE_MESSAGE = "Duplicate in file (also in row {})"
+FILE_DUPLICATE_RE = re.compile("^" + re.escape(FILE_DUPLICATE_MESSAGE).replace(r"\{\}", r"(\d+)") + "$")
+
+# personal_message at or above this many bytes is stored zlib-compressed (base85 text)
+COMPRESS_MIN_BYTES = 256
+COMPRESSED_MARKER = "z"
+
+ROW_FIELDS = (
+    "id", "row_number", "guest_name", "guest_email", "ticket_type", "company",
+    "personal_message", "status", "error_found", "duplicate", "file_level_duplicate", "errors",
+)
+
+
+def _encode_message(pm):
+    raw = pm.encode()
+    if len(raw) < COMPRESS_MIN_BYTES:
+        return pm
+    packed = base64.b85encode(zlib.compress(raw, 6)).decode("ascii")
+    return [COMPRESSED_MARKER, packed] if len(packed) < len(raw) else pm
+
+
+def _decode_message(value):
+    if isinstance(value, list):
+        return zlib.decompress(base64.b85decode(value[1])).decode()
+    return value
+
+
+def _encode_errors(errors):
+    """Known field/message pairs become small ints, anything else is kept verbatim."""
+    encoded = []
+    for field, message in errors.items():
+        code = ERROR_FIELDS.index(field) if field in ERROR_FIELDS else field
+        if field in ERROR_MESSAGES and message == ERROR_MESSAGES[field]:
+            encoded.append(code)
+            continue
+        if field == "file_level_duplicate":
+            match = FILE_DUPLICATE_RE.match(message)
+            if match:
+                encoded.append([code, int(match.group(1))])
+                continue
+        encoded.append([code, message])
+    return encoded
+
+
+def _decode_errors(encoded):
+    errors = {}
+    for item in encoded:
+        if isinstance(item, int):
+            field = ERROR_FIELDS[item]
+            errors[field] = ERROR_MESSAGES[field]
+            continue
+        code, message = item
+        field = ERROR_FIELDS[code] if isinstance(code, int) else code
+        errors[field] = FILE_DUPLICATE_MESSAGE.format(message) if isinstance(message, int) else message
+    return errors
+
+
+def encode_row(row_obj):
+    """Encode a row_obj for the Redis rows hash (text, so it works with decode_responses)."""
+    status = row_obj.get("status")
+    flags = (
+        (FLAG_ERROR_FOUND if row_obj.get("error_found") else 0)
+        | (FLAG_DUPLICATE if row_obj.get("duplicate") else 0)
+        | (FLAG_FILE_LEVEL_DUPLICATE if row_obj.get("file_level_duplicate") else 0)
+    )
+    packed = [
+        CODEC_VERSION,
+        row_obj["id"],
+        row_obj.get("row_number"),
+        row_obj.get("guest_name"),
+        row_obj.get("guest_email"),
+        row_obj.get("ticket_type"),
+        row_obj.get("company"),
+        _encode_message(row_obj.get("personal_message") or ""),
+        STATUSES.index(status) if status in STATUSES else status,
+        flags,
+        _encode_errors(row_obj.get("errors") or {}),
+    ]
+    extra = {k: v for k, v in row_obj.items() if k not in ROW_FIELDS}
+    if extra:
+        packed.append(extra)
+    return orjson.dumps(packed)
+
+
+def decode_row(raw):
+    """Decode a stored row; rows written before the codec (plain orjson dicts) still load."""
+    data = orjson.loads(raw)
+    if isinstance(data, dict):
+        return data
+    if data[0] != CODEC_VERSION:
+        raise ValueError(f"Unsupported row codec version {data[0]}")
+
+    (_, row_id, row_number, name, email, ticket, company,
+     pm, status, flags, errors, *extra) = data
+    row_obj = {
+        "id": row_id,
+        "row_number": row_number,
+        "guest_name": name,
+        "guest_email": email,
+        "ticket_type": ticket,
+        "company": company,
+        "personal_message": _decode_message(pm),
+        "status": STATUSES[status] if isinstance(status, int) else status,
+        "error_found": bool(flags & FLAG_ERROR_FOUND),
+        "duplicate": bool(flags & FLAG_DUPLICATE),
+        "file_level_duplicate": bool(flags & FLAG_FILE_LEVEL_DUPLICATE),
+        "errors": _decode_errors(errors),
+    }
+    if extra:
+        row_obj.update(extra[0])
+    return row_obj
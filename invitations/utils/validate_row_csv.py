@@ -4,6 +4,7 @@ from django.core.validators import validate_email
 from django.core.exceptions import ValidationError as DjangoValidationError
 from adminapp.models import TicketType
 from invitations.utils.redis_utils import get_redis
+from invitations.utils.row_codec import FILE_DUPLICATE_MESSAGE
 TICKET_CACHE_KEY = "ticket_types_cache"
 name_re = re.compile(r"^[A-Za-z0-9\s\.'\-]{2,255}$")
 
@@ -91,8 +92,6 @@ def validate_row_csv_dict(
         enforce_unique = ticket_type_obj.get("enforce_unique_email", False)
         key_ticket = (email, ticket_norm)
         key_global = email
-        print("KEY GLOBAL", key_global)
-        print("KEY TICKET", key_ticket)
 
         # --- DB-level (existing) duplicates ---
         # if global_unique_enabled:
@@ -105,26 +104,6 @@ def validate_row_csv_dict(
                 duplicate_db = True
                 errors["duplicate"] = "Duplicate invitation for this email and ticket type."
 
-        # --- File-level duplicates ---
-        if seen_lock:
-            with seen_lock:
-                # if global_unique_enabled:
-                #     if key_global in seen_global_dupes:
-                #         file_level_duplicate = True
-                #         errors["file_level_duplicate"] = (
-                #             f"Duplicate in file (also in row {seen_global_dupes[key_global]})"
-                #         )
-                #     else:
-                #         seen_global_dupes[key_global] = row_number
-                if enforce_unique:
-                    if key_ticket in seen_ticket_dupes:
-                        file_level_duplicate = True
-                        errors["file_level_duplicate"] = (
-                            f"Duplicate in file (also in row {seen_ticket_dupes[key_ticket]})"
-                        )
-                    else:
-                        seen_ticket_dupes[key_ticket] = row_number
-
     status = "valid" if not errors else "invalid"
 
     row_obj = {
@@ -142,6 +121,66 @@ def validate_row_csv_dict(
         "errors": errors,
     }
 
+    # --- File-level duplicates ---
+    if seen_lock:
+        with seen_lock:
+            # if global_unique_enabled:
+            #     if key_global in seen_global_dupes:
+            #         file_level_duplicate = True
+            #         errors["file_level_duplicate"] = (
+            #             f"Duplicate in file (also in row {seen_global_dupes[key_global]})"
+            #         )
+            #     else:
+            #         seen_global_dupes[key_global] = row_number
+            apply_file_level_duplicate(row_obj, ticket_cache, seen_ticket_dupes)
+
     return row_obj, errors
 
 
+
+
+def dupe_key(row_obj, ticket_cache):
+    """
+    The (email, ticket) pair a validated row competes on for file-level uniqueness,
+    or None when it doesn't take part (field errors, or ticket not enforcing unique emails).
+    """
+    errors = row_obj["errors"]
+    if any(field in errors for field in ("guest_name", "guest_email", "ticket_type")):
+        return None
+
+    email = row_obj["guest_email"]
+    ticket_norm = row_obj["ticket_type"]
+    ticket_type_obj = ticket_cache.get(ticket_norm) if ticket_cache else None
+    if not email or not ticket_type_obj or not ticket_type_obj.get("enforce_unique_email", False):
+        return None
+    return (email, ticket_norm)
+
+
+def set_file_level_duplicate(row_obj, first_row_number=None):
+    """Mark a row as duplicating `first_row_number`, or clear the mark when None."""
+    errors = row_obj["errors"]
+    if first_row_number is None:
+        errors.pop("file_level_duplicate", None)
+    else:
+        errors["file_level_duplicate"] = FILE_DUPLICATE_MESSAGE.format(first_row_number)
+    row_obj["file_level_duplicate"] = first_row_number is not None
+    row_obj["status"] = "valid" if not errors else "invalid"
+    row_obj["error_found"] = bool(errors)
+    return row_obj
+
+
+def apply_file_level_duplicate(row_obj, ticket_cache, seen_ticket_dupes):
+    """
+    Marks an already validated row as a file-level duplicate when its
+    (email, ticket) pair was seen earlier in the file, otherwise records it.
+    Callers must feed rows in row order for deterministic results.
+    """
+    key_ticket = dupe_key(row_obj, ticket_cache)
+    if key_ticket is None:
+        return row_obj
+
+    if key_ticket in seen_ticket_dupes:
+        set_file_level_duplicate(row_obj, seen_ticket_dupes[key_ticket])
+    else:
+        seen_ticket_dupes[key_ticket] = row_obj["row_number"]
+    return row_obj
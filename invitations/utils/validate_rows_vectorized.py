@@ -0,0 +1,153 @@
+import numpy as np
+import pandas as pd
+from django.core.validators import validate_email
+from django.core.exceptions import ValidationError as DjangoValidationError
+
+NAME_PATTERN = r"^[A-Za-z\s\.'\-]{2,255}$"
+FIELD_ERRORS = ("guest_name", "guest_email", "ticket_type")
+
+
+def _column(frame, *names):
+    """First non-empty value across the given header aliases, stripped (like `row.get(a) or row.get(b)`)."""
+    result = pd.Series("", index=frame.index, dtype=object)
+    for name in reversed(names):
+        if name in frame.columns:
+            values = frame[name].fillna("").astype(str)
+            result = values.where(values != "", result)
+    return result.str.strip()
+
+
+def _email_mask(email):
+    """Column-wise equivalent of django's validate_email (same regexes, same length limit)."""
+    parts = email.str.rpartition("@")
+    user_part, at, domain_part = parts[0], parts[1], parts[2]
+
+    ok = (email != "") & (at == "@") & (email.str.len() <= 320)
+    ok &= user_part.str.match(validate_email.user_regex.pattern, flags=validate_email.user_regex.flags)
+
+    domain_ok = domain_part.isin(validate_email.domain_allowlist)
+    domain_ok |= domain_part.str.match(validate_email.domain_regex.pattern, flags=validate_email.domain_regex.flags)
+    ok &= domain_ok
+
+    # IP literals ([1.2.3.4]) are rare: defer them to the scalar validator
+    literal = (at == "@") & domain_part.str.startswith("[") & ~ok
+    for idx in email.index[literal]:
+        try:
+            validate_email(email[idx])
+            ok[idx] = True
+        except DjangoValidationError:
+            pass
+    return ok.fillna(False).astype(bool)
+
+
+def validate_rows_vectorized(
+    rows,
+    start_row,
+    existing_ticket=None,
+    ticket_cache=None,
+    seen_ticket_dupes=None,
+    default_message=None,
+):
+    """
+    Column-wise version of validate_row_csv_dict for large uploads.
+    Takes a batch of CSV dict rows, returns row_objs in the same shape and order,
+    with DB-level and file-level duplicates already resolved.
+    `seen_ticket_dupes` carries file-level state across batches.
+    """
+    if not rows:
+        return []
+
+    ticket_cache = ticket_cache or {}
+    existing_ticket = existing_ticket or set()
+    if seen_ticket_dupes is None:
+        seen_ticket_dupes = {}
+
+    frame = pd.DataFrame.from_records(rows)
+    row_numbers = np.arange(start_row, start_row + len(frame))
+
+    # --- Normalisation ---
+    name = _column(frame, "Full Name", "full_name")
+    email = _column(frame, "Email", "email").str.lower()
+    ticket_raw = _column(frame, "Ticket Type", "ticket_type")
+    ticket_norm = ticket_raw.str.lower()
+    company = _column(frame, "Company", "company")
+    pm = _column(frame, "Personal Message", "personal_message")
+    if default_message:
+        pm = pm.where(pm != "", default_message[:500])
+
+    # --- Field checks ---
+    name_bad = ~((name.str.len() >= 2) & name.str.match(NAME_PATTERN).fillna(False).astype(bool))
+    email_bad = ~_email_mask(email)
+
+    ticket_names = list(ticket_cache)
+    ticket_codes = pd.Categorical(ticket_norm, categories=ticket_names).codes
+    ticket_bad = ticket_codes < 0
+    enforce_by_code = np.array(
+        [bool(ticket_cache[t].get("enforce_unique_email", False)) for t in ticket_names] + [False]
+    )
+    enforce = enforce_by_code[ticket_codes]  # code -1 hits the trailing False
+
+    # --- Duplicate checks (only rows without field errors) ---
+    eligible = ~(name_bad.to_numpy() | email_bad.to_numpy() | ticket_bad) & (email != "").to_numpy() & enforce
+    pair_key = email + "\x1f" + ticket_norm
+    existing_keys = {f"{e}\x1f{t}" for e, t in existing_ticket}
+    duplicate_db = eligible & pair_key.isin(existing_keys).to_numpy()
+
+    file_dup = np.zeros(len(frame), dtype=bool)
+    file_dup_ref = np.zeros(len(frame), dtype=np.int64)
+    if eligible.any():
+        keys = pair_key[eligible]
+        numbers = pd.Series(row_numbers[eligible], index=keys.index)
+        first_in_batch = numbers.groupby(keys.values).transform("first")
+        prior = pd.Series(
+            [seen_ticket_dupes.get((e, t)) for e, t in zip(email[eligible], ticket_norm[eligible])],
+            index=keys.index,
+            dtype="float64",
+        )
+        is_dup = prior.notna() | (numbers != first_in_batch)
+        ref = prior.fillna(first_in_batch).astype(np.int64)
+
+        positions = np.flatnonzero(eligible)
+        file_dup[positions] = is_dup.to_numpy()
+        file_dup_ref[positions] = ref.to_numpy()
+
+        firsts = ~is_dup
+        for e, t, n in zip(email[eligible][firsts], ticket_norm[eligible][firsts], numbers[firsts]):
+            seen_ticket_dupes[(e, t)] = int(n)
+
+    # --- Assemble row_objs ---
+    results = []
+    columns = zip(
+        row_numbers, name, email, ticket_norm, ticket_raw, company, pm,
+        name_bad, email_bad, ticket_bad, duplicate_db, file_dup, file_dup_ref,
+    )
+    for (row_number, g_name, g_email, t_norm, t_raw, g_company, g_pm,
+         bad_name, bad_email, bad_ticket, dup_db, dup_file, dup_ref) in columns:
+        errors = {}
+        if bad_name:
+            errors["guest_name"] = "Full Name is required (min 2 chars, letters only)."
+        if bad_email:
+            errors["guest_email"] = "Invalid email format."
+        if bad_ticket:
+            errors["ticket_type"] = "Select valid ticket."
+        if dup_db:
+            errors["duplicate"] = "Duplicate invitation for this email and ticket type."
+        if dup_file:
+            errors["file_level_duplicate"] = f"Duplicate in file (also in row {dup_ref})"
+
+        row_number = int(row_number)
+        results.append({
+            "id": row_number,
+            "row_number": row_number,
+            "guest_name": g_name,
+            "guest_email": g_email,
+            "ticket_type": t_norm or t_raw,
+            "company": g_company,
+            "personal_message": g_pm,
+            "status": "valid" if not errors else "invalid",
+            "error_found": bool(errors),
+            "duplicate": bool(dup_db),
+            "file_level_duplicate": bool(dup_file),
+            "errors": errors,
+        })
+    return results
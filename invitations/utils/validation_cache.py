@@ -0,0 +1,90 @@
+import orjson
+import xxhash
+from decouple import config
+
+from invitations.models import BulkUploadJob
+from invitations.utils.redis_utils import (
+    get_redis, copy_job_keys, get_version, get_versions, set_status
+)
+
+CACHE_TTL = config("BULK_VALIDATION_CACHE_TTL", cast=int, default=24 * 60 * 60)
+
+TICKET_TYPES_VERSION = "ticket_types"
+
+
+def invitations_version(ticket_type_id):
+    """Version of the stored invitations of one ticket type."""
+    return f"invitations:{ticket_type_id}"
+
+
+def bump_invitation_versions(ticket_type_ids):
+    """Invalidate cached validations that depend on these ticket types' invitations."""
+    pipe = get_redis().pipeline(transaction=False)
+    for ticket_type_id in {t for t in ticket_type_ids if t is not None}:
+        pipe.incr(f"version:{invitations_version(ticket_type_id)}")
+    pipe.execute()
+
+
+def file_digest(uploaded_file):
+    """Content hash of an uploaded file, streamed chunk by chunk."""
+    digest = xxhash.xxh3_128()
+    for chunk in uploaded_file.chunks():
+        digest.update(chunk)
+    uploaded_file.seek(0)
+    return digest.hexdigest()
+
+
+def validation_cache_key(digest):
+    """
+    Cache key for validated rows of a file: the file content plus the versions of
+    everything validation depends on: the ticket type config and the invitations of
+    the ticket types that enforce unique emails (others never make a row a duplicate).
+    """
+    from adminapp.models import TicketType
+
+    enforced = TicketType.objects.filter(enforce_unique_email=True).order_by("id").values_list("id", flat=True)
+    versions = get_versions([invitations_version(t) for t in enforced])
+    invitations = xxhash.xxh3_64_hexdigest(",".join(f"{t}={v}" for t, v in zip(enforced, versions)))
+    return f"{digest}:{get_version(TICKET_TYPES_VERSION)}:{invitations}"
+
+
+def store_validation_result(job_id, cache_key, total_count, valid_count, invalid_count, preview):
+    """Keep a copy of a finished job's validated rows under the cache key."""
+    r = get_redis()
+    copy_job_keys(job_id, f"cache:{cache_key}", ttl=CACHE_TTL)
+    r.set(
+        f"bulk:cache:{cache_key}",
+        orjson.dumps({
+            "total_count": total_count,
+            "valid_count": valid_count,
+            "invalid_count": invalid_count,
+            "preview": preview,
+        }),
+        ex=CACHE_TTL,
+    )
+
+
+def restore_validation_result(job, cache_key):
+    """
+    Clone cached validated rows into `job` and mark it preview-ready.
+    Returns False on a cache miss.
+    """
+    r = get_redis()
+    cached = r.get(f"bulk:cache:{cache_key}")
+    if not cached or not r.exists(f"bulk:job:cache:{cache_key}:rows"):
+        return False
+
+    meta = orjson.loads(cached)
+    copy_job_keys(f"cache:{cache_key}", job.id)
+
+    job.total_count = meta["total_count"]
+    job.valid_count = meta["valid_count"]
+    job.invalid_count = meta["invalid_count"]
+    job.preview_data = meta["preview"]
+    job.status = BulkUploadJob.STATUS_PREVIEW_READY
+    job.save(update_fields=[
+        "total_count", "valid_count", "invalid_count",
+        "preview_data", "status", "updated_at"
+    ])
+    set_status(job.id, "done")
+    return True
@@ -0,0 +1,135 @@
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import billiard
+
+from invitations.utils.validate_row_csv import validate_row_csv_dict
+
+BACKEND_THREADS = "threads"
+BACKEND_PROCESSES = "processes"
+BACKEND_INLINE = "inline"
+BACKENDS = (BACKEND_THREADS, BACKEND_PROCESSES, BACKEND_INLINE)
+
+# Per-process validation context, filled once by the pool initializer
+_worker_context = {}
+
+
+def _init_worker(ticket_cache, existing_ticket, default_message):
+    """Process pool initializer: receive the shared caches once per worker."""
+    from django.apps import apps
+    if not apps.ready:
+        import django
+        django.setup()
+
+    _worker_context["ticket_cache"] = ticket_cache
+    _worker_context["existing_ticket"] = existing_ticket
+    _worker_context["default_message"] = default_message
+
+
+def _validate_part(rows, start_row, context):
+    """
+    Validate a slice of CSV rows without file-level duplicate tracking.
+    File-level duplicates are merged afterwards in row order by the caller.
+    """
+    results = []
+    for i, row in enumerate(rows, start=start_row):
+        row_obj, _ = validate_row_csv_dict(
+            row=row,
+            row_number=i,
+            existing_ticket=context["existing_ticket"],
+            ticket_cache=context["ticket_cache"],
+            default_message=context["default_message"],
+        )
+        row_obj["id"] = i
+        results.append(row_obj)
+    return results
+
+
+def _validate_part_in_worker(rows, start_row, existing_ticket=None):
+    context = _worker_context
+    if existing_ticket is not None:
+        context = {**_worker_context, "existing_ticket": existing_ticket}
+    return _validate_part(rows, start_row, context)
+
+
+class ValidationEngine:
+    """
+    Pluggable executor for validate_row_csv_dict.
+    - threads: shares memory, limited by the GIL
+    - processes: real parallelism, caches shipped once per worker process. The pool
+      is billiard's (Celery's multiprocessing fork), which may be started from a
+      daemonic Celery prefork child, where the stdlib pools refuse to fork
+    - inline: no pool at all (small files, debugging, benchmarks)
+    Results always come back in row order.
+    """
+
+    def __init__(self, backend=BACKEND_THREADS, max_workers=None,
+                 ticket_cache=None, existing_ticket=None, default_message=None):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown validation backend '{backend}'. Use one of {BACKENDS}.")
+
+        self.backend = backend
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.context = {
+            "ticket_cache": ticket_cache or {},
+            "existing_ticket": existing_ticket or set(),
+            "default_message": default_message,
+        }
+        self._executor = None
+
+    def __enter__(self):
+        if self.backend == BACKEND_THREADS:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        elif self.backend == BACKEND_PROCESSES:
+            self._executor = billiard.Pool(
+                processes=self.max_workers,
+                initializer=_init_worker,
+                initargs=(
+                    self.context["ticket_cache"],
+                    self.context["existing_ticket"],
+                    self.context["default_message"],
+                ),
+            )
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._executor is None:
+            return
+        if self.backend == BACKEND_PROCESSES:
+            if exc_type is None:
+                self._executor.close()
+            else:
+                self._executor.terminate()
+            self._executor.join()
+        else:
+            self._executor.shutdown(wait=True)
+        self._executor = None
+
+    def validate(self, rows, start_row, existing_ticket=None):
+        """
+        Validate one batch of rows, returning row_objs in row order.
+        `existing_ticket` overrides the engine-wide DB duplicate set for this batch.
+        """
+        context = self.context
+        if existing_ticket is not None:
+            context = {**self.context, "existing_ticket": existing_ticket}
+
+        if self._executor is None or len(rows) < 2:
+            return _validate_part(rows, start_row, context)
+
+        sub_size = max(1, math.ceil(len(rows) / self.max_workers))
+        futures = []
+        for t in range(0, len(rows), sub_size):
+            part = rows[t:t + sub_size]
+            if self.backend == BACKEND_PROCESSES:
+                futures.append(self._executor.apply_async(
+                    _validate_part_in_worker, (part, start_row + t, existing_ticket)
+                ))
+            else:
+                futures.append(self._executor.submit(_validate_part, part, start_row + t, context))
+
+        results = []
+        for f in futures:
+            results.extend(f.get() if self.backend == BACKEND_PROCESSES else f.result())
+        return results
@@ -18,6 +18,9 @@ from .helpers.bulk_helpers.bulk_row_patch_helper import handle_bulk_row_patch
 from .helpers.bulk_helpers.bulk_clear_preview_helper import handle_bulk_clear_preview
 from .helpers.bulk_helpers.bulk_confirm_helper import handle_bulk_confirm_request
 from .helpers.bulk_helpers.bulk_row_delete_helper import handle_bulk_row_delete
+from .helpers.bulk_helpers.bulk_rows_batch_helper import (
+    handle_bulk_rows_batch_patch, handle_bulk_rows_batch_delete
+)
 from .helpers.bulk_helpers.bulk_job_status_helper import handle_bulk_job_status
 from .helpers.invitation_helpers.invitation_list_helper import handle_invitation_list
 from .helpers.invitation_helpers.invitation_link_generate_helper import handle_invitation_link_generate
@@ -150,6 +153,20 @@ class BulkRowDeleteView(APIView):
         return handle_bulk_row_delete(request, job_id, row_number)
 
 
+class BulkRowsBatchView(APIView):
+    """
+    Updates or deletes many preview rows of a bulk upload job in one request,
+    revalidating them together and returning the updated rows and stats.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def patch(self, request, job_id):
+        return handle_bulk_rows_batch_patch(request, job_id)
+
+    def delete(self, request, job_id):
+        return handle_bulk_rows_batch_delete(request, job_id)
+
+
 class BulkJobStatusView(APIView):
     """
     Retrieves the current processing status and summary